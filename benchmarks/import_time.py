@@ -0,0 +1,52 @@
+"""Measures the time it takes to import portable_device and to start the CLI.
+
+Each measurement runs in a fresh interpreter, so nothing is cached in
+sys.modules. Run from the repository root:
+
+    python benchmarks/import_time.py [--runs N]
+"""
+
+import argparse
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import time
+
+root = Path(__file__).resolve().parent.parent
+
+cases = {
+    "python (baseline)": ["-c", "pass"],
+    "import portable_device": ["-c", "import portable_device"],
+    "import portable_device.Device": ["-c", "from portable_device import Device"],
+    "cli --help": ["-m", "portable_device.cli.cli", "--help"],
+}
+
+
+def measure(arguments: list[str], runs: int) -> list[float]:
+    environment = {**os.environ, "PYTHONPATH": str(root / "src")}
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], env = environment, stdout = subprocess.DEVNULL,
+                       stderr = subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type = int, default = 10)
+    args = parser.parse_args()
+
+    print(f"{'Case':<35}{'Median':>10}{'Min':>10}")
+    print(f"{'----':<35}{'------':>10}{'---':>10}")
+    for name, arguments in cases.items():
+        times = measure(arguments, args.runs)
+        print(f"{name:<35}{statistics.median(times) * 1000:>8.1f}ms{min(times) * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
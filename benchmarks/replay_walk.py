@@ -0,0 +1,72 @@
+"""Replays a recorded session that walked a device and read the names of all
+objects, and measures how long the walk takes.
+
+Record the session on a machine with the device attached:
+
+    python benchmarks/replay_walk.py record "<device description>" session.gz
+
+Replay it (with the recorded latencies, scaled, or without latencies):
+
+    python benchmarks/replay_walk.py replay session.gz [--latency-scale 0]
+"""
+
+import argparse
+import time
+
+from portable_device import Device
+# Unlike portable_device_api.definitions, this also works for replaying on a
+# platform without portable_device_api
+from portable_device._api import definitions
+from portable_device.recording import Recorder
+from portable_device.replay import ReplaySession
+
+
+def walk(device: Device) -> int:
+    count = 0
+    with device:
+        for depth, object_ in device.walk():
+            object_.get_properties([definitions.WPD_OBJECT_NAME, definitions.WPD_OBJECT_ORIGINAL_FILE_NAME])
+            count += 1
+    return count
+
+
+def record(args):
+    recorder = Recorder()
+    device = recorder.device(Device.by_description(args.device_description))
+
+    start = time.perf_counter()
+    count = walk(device)
+    print(f"Recorded {recorder.call_count} calls for {count} objects in {time.perf_counter() - start:.3f}s")
+
+    recorder.save(args.path)
+
+
+def replay(args):
+    session = ReplaySession.load(args.path, latency_scale = args.latency_scale)
+
+    start = time.perf_counter()
+    count = walk(session.device())
+    print(f"Replayed {session.call_count} calls for {count} objects in {time.perf_counter() - start:.3f}s "
+          f"(recorded device latency: {session.recorded_latency:.3f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(required = True)
+
+    record_parser = subparsers.add_parser("record")
+    record_parser.add_argument("device_description")
+    record_parser.add_argument("path")
+    record_parser.set_defaults(function = record)
+
+    replay_parser = subparsers.add_parser("replay")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--latency-scale", type = float, default = 1.0)
+    replay_parser.set_defaults(function = replay)
+
+    args = parser.parse_args()
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,56 @@
-from .object_list import ObjectList
-from .object import Object
-from .device import Device
+# The submodules are imported lazily, on first access of one of their names.
+# Most of them import comtypes and portable_device_api, which take a long time
+# to import, and which are not needed, e. g., for `--help` of the CLI.
+
+from importlib import import_module
+
+# Not imported from typing, which takes longer to import than everything else
+# here together; type checkers treat this the same
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .chunk_size import AdaptiveChunkSize
+    from .progress import TransferProgress
+    from .property_values import PropertyValues
+    from .events import EventKind, DeviceEvent, LocalEventSource
+    from .object_list import ObjectSequence, ObjectList, LazyObjectList
+    from .object import Object
+    from .device import Device
+    from .device_pool import DevicePool, DeviceResult
+    from .persistent_id_index import PersistentIdIndex
+    from .content_index import ContentIndex
+
+_submodules = {
+    "AdaptiveChunkSize": ".chunk_size",
+    "TransferProgress": ".progress",
+    "PropertyValues": ".property_values",
+    "EventKind": ".events",
+    "DeviceEvent": ".events",
+    "LocalEventSource": ".events",
+    "ObjectSequence": ".object_list",
+    "ObjectList": ".object_list",
+    "LazyObjectList": ".object_list",
+    "Object": ".object",
+    "Device": ".device",
+    "DevicePool": ".device_pool",
+    "DeviceResult": ".device_pool",
+    "PersistentIdIndex": ".persistent_id_index",
+    "ContentIndex": ".content_index",
+}
+
+__all__ = list(_submodules)
+
+
+def __getattr__(name: str):
+    try:
+        submodule = _submodules[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    value = getattr(import_module(submodule, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_submodules))
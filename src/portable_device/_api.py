@@ -0,0 +1,70 @@
+"""The parts of comtypes and portable_device_api that are needed to import the
+package's device access modules.
+
+Both are only available on Windows. Without them, these modules can still be
+imported and used with a recorded session (see portable_device.replay): WPD
+definitions are then represented by RecordedDefinition, which is also what
+the replay decodes recorded definitions to, and COM errors by ReplayedError.
+Everything else from portable_device_api is imported where it is used."""
+
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+# VARENUM values, as in comtypes.automation
+VT_ERROR = 10
+VT_UI8 = 21
+VT_LPWSTR = 31
+VT_CLSID = 72
+
+
+@dataclass(frozen = True)
+class RecordedDefinition:
+    """A WPD definition (e. g. a property key) by name, used if
+    portable_device_api is not available"""
+    name: str
+
+
+class _RecordedDefinitions:
+    """Stands in for portable_device_api.definitions"""
+
+    # Definitions that are passed to the device by value rather than by name
+    _values = {
+        "WPD_DEVICE_OBJECT_ID": "DEVICE",
+        "DELETE_OBJECT_OPTIONS": SimpleNamespace(PORTABLE_DEVICE_DELETE_NO_RECURSION = 0,
+                                                 PORTABLE_DEVICE_DELETE_WITH_RECURSION = 1),
+    }
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self._values.get(name, RecordedDefinition(name))
+
+
+try:
+    from comtypes import COMError
+except ImportError:
+    COMError = None
+
+
+class ReplayedError(COMError or RuntimeError):
+    """Raised for a recorded error. If comtypes is available, this is a
+    COMError, so it is handled like the original error."""
+
+    def __init__(self, hresult: int | None, text: str):
+        if COMError is None:
+            super().__init__(hresult, text)
+        else:
+            super().__init__(hresult, text, None)
+        self.hresult = hresult
+        self.text = text
+
+
+if COMError is None:
+    COMError = ReplayedError
+
+try:
+    from portable_device_api import definitions
+    available = True
+except ImportError:
+    definitions = _RecordedDefinitions()
+    available = False
@@ -0,0 +1,154 @@
+"""Copying objects on a device, see Object.copy_into"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Generator
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING
+
+from portable_device import ObjectList
+from portable_device._api import definitions
+from portable_device.chunk_size import AdaptiveChunkSize, chunk_sizer
+from portable_device.com import apartment
+from portable_device.exceptions import ObjectNotFound
+from portable_device.pipe import pipe
+from portable_device.progress import ProgressCallback, progress_reporter
+
+if TYPE_CHECKING:  # pragma: no cover
+    from portable_device import Device, Object
+
+_container_types = (
+    definitions.WPD_CONTENT_TYPE_FOLDER,
+    definitions.WPD_CONTENT_TYPE_FUNCTIONAL_OBJECT,
+)
+
+
+@dataclass
+class _Entry:
+    object: Object
+    name: str
+    size: int | None
+    persistent_id: str | None
+    # The entries of the children, for a folder
+    children: list[_Entry] | None = None
+
+
+def _entry(object_: Object) -> _Entry:
+    properties = object_.get_properties([
+        definitions.WPD_OBJECT_CONTENT_TYPE,
+        definitions.WPD_OBJECT_NAME,
+        definitions.WPD_OBJECT_ORIGINAL_FILE_NAME,
+        definitions.WPD_OBJECT_SIZE,
+        definitions.WPD_OBJECT_PERSISTENT_UNIQUE_ID,
+    ])
+    entry = _Entry(object_,
+                   properties.get(definitions.WPD_OBJECT_ORIGINAL_FILE_NAME) or properties.get(definitions.WPD_OBJECT_NAME),
+                   properties.get(definitions.WPD_OBJECT_SIZE),
+                   properties.get(definitions.WPD_OBJECT_PERSISTENT_UNIQUE_ID))
+
+    if properties.get(definitions.WPD_OBJECT_CONTENT_TYPE) in _container_types:
+        entry.children = [_entry(child) for child in object_.children().materialize()]
+
+    return entry
+
+
+def _check_target(object_: Object, target: Object):
+    """Raises ValueError if `target` is a descendant of `object_` (which would
+    have to contain its own copy)"""
+    ancestor = target.parent()
+    while ancestor is not None:
+        if ancestor.object_id == object_.object_id:
+            raise ValueError(f"Cannot copy {object_.object_id!r} into its descendant {target.object_id!r}")
+        ancestor = ancestor.parent()
+
+
+def _files(entries: Iterable[_Entry]) -> Iterator[_Entry]:
+    """The files with a size, in the order in which they are copied"""
+    for entry in entries:
+        if entry.children is not None:
+            yield from _files(entry.children)
+        elif entry.size is not None:
+            yield entry
+
+
+def _download(device: Device, files: list[_Entry], chunk_size: int | AdaptiveChunkSize | None,
+              progress: ProgressCallback | None) -> Generator[bytes | None]:
+    """Downloads the content of the files, each followed by None.
+
+    Unless the device has an `api_device`, the content is downloaded through a
+    new connection to the device, which is opened (and closed again) by the
+    thread that iterates the result. The objects are looked up by persistent
+    unique ID, if they have one, since object IDs are not guaranteed to be the
+    same for another connection."""
+    if device._api_device is not None:
+        for entry in files:
+            yield from entry.object.download(chunk_size, progress = progress, size = entry.size)
+            yield None
+        return
+
+    from portable_device import Device
+
+    with apartment():
+        connection = Device(device.device_id)
+        objects = object_ = None
+        try:
+            with connection:
+                objects = connection.objects_by_persistent_ids(entry.persistent_id for entry in files
+                                                               if entry.persistent_id)
+                for entry in files:
+                    if entry.persistent_id:
+                        object_ = objects[entry.persistent_id]
+                        if object_ is None:
+                            raise ObjectNotFound(repr(entry.persistent_id))
+                    else:
+                        object_ = type(entry.object)(connection, entry.object.object_id)
+                    yield from object_.download(chunk_size, progress = progress, size = entry.size)
+                    yield None
+        finally:
+            # Release the device's COM objects before the apartment is torn
+            # down
+            connection.release()
+            del connection, objects, object_
+
+
+def _create(entry: _Entry, target: Object, chunks: Iterator[bytes | None],
+            chunk_size: int | AdaptiveChunkSize | None, progress: ProgressCallback | None) -> Object:
+    if entry.children is not None:
+        directory = target.create_directory(entry.name)
+        for child in entry.children:
+            _create(child, directory, chunks, chunk_size, progress)
+        return directory
+
+    if entry.size is None:
+        # We need the size to create the file
+        return target.upload_file(entry.name, entry.object.download_all(chunk_size, progress = progress), chunk_size)
+
+    stream, optimal_transfer_size = target._create_file(entry.name, entry.size)
+    # The chunks of this file, up to the following None
+    return target._write_file(stream, iter(partial(next, chunks), None),
+                              chunk_sizer(None, target.device.device_id, optimal_transfer_size),
+                              progress_reporter(None))
+
+
+def copy(objects: Iterable[Object], target: Object, chunk_size: int | AdaptiveChunkSize | None,
+         progress: ProgressCallback | None, buffers: int) -> ObjectList:
+    # Enumerate all objects first; if `target` is one of the objects, or their
+    # parent, the copies must not be copied again
+    entries = [_entry(object_) for object_ in objects]
+    if not entries:
+        return ObjectList()
+
+    for entry in entries:
+        if entry.children is not None:
+            _check_target(entry.object, target)
+
+    device = entries[0].object.device
+    chunks = _download(device, list(_files(entries)), chunk_size, progress)
+    if device._api_device is None:
+        chunks = pipe(chunks, buffers = buffers)
+
+    try:
+        return ObjectList([_create(entry, target, chunks, chunk_size, progress) for entry in entries])
+    finally:
+        chunks.close()
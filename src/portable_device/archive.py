@@ -0,0 +1,195 @@
+from collections.abc import Iterator, Generator
+from contextlib import closing
+from datetime import datetime
+import io
+from pathlib import PurePosixPath
+import tarfile
+import time
+from typing import BinaryIO
+import zipfile
+
+from portable_device import Object
+from portable_device._api import definitions
+from portable_device.chunk_size import AdaptiveChunkSize
+from portable_device.progress import ProgressCallback
+
+formats = ("zip", "tar", "tar.gz")
+
+# All properties needed for an entry are queried at once
+_entry_keys = (
+    definitions.WPD_OBJECT_CONTENT_TYPE,
+    definitions.WPD_OBJECT_NAME,
+    definitions.WPD_OBJECT_ORIGINAL_FILE_NAME,
+    definitions.WPD_OBJECT_SIZE,
+    definitions.WPD_OBJECT_DATE_MODIFIED,
+)
+
+_container_types = (
+    definitions.WPD_CONTENT_TYPE_FOLDER,
+    definitions.WPD_CONTENT_TYPE_FUNCTIONAL_OBJECT,
+)
+
+
+class _DownloadReader:
+    """A minimal read-only file object over a download, for tarfile, which
+    expects `read` to return the requested size unless at the end"""
+
+    def __init__(self, chunks: Generator[bytes]):
+        self._chunks = chunks
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer.extend(chunk)
+
+        if size < 0:
+            size = len(self._buffer)
+
+        result = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return result
+
+    def close(self):
+        # Close the download, so the object is not locked
+        self._chunks.close()
+
+
+class _Entry:
+    def __init__(self, object_: Object, path: str, properties):
+        self.object = object_
+        self.path = path
+        self.is_directory = properties.get(definitions.WPD_OBJECT_CONTENT_TYPE) in _container_types
+        self.size: int | None = properties.get(definitions.WPD_OBJECT_SIZE)
+
+        modified = properties.get(definitions.WPD_OBJECT_DATE_MODIFIED)
+        self.mtime = modified.timestamp() if isinstance(modified, datetime) else time.time()
+
+    @staticmethod
+    def name(properties) -> str:
+        """A name that is safe to use as a path component in the archive"""
+        name = (properties.get(definitions.WPD_OBJECT_ORIGINAL_FILE_NAME)
+                or properties.get(definitions.WPD_OBJECT_NAME)
+                or "")
+        name = name.replace("/", "_").replace("\\", "_")
+
+        if name in ("", ".", ".."):
+            # These would refer to a different directory
+            name = name.replace(".", "_") or "_"
+
+        return name
+
+
+def _unique_name(name: str, used: set[str]) -> str:
+    """Appends a number to `name` if it is in `used` (the names of the
+    siblings so far), so there are no duplicate archive members"""
+    unique_name = name
+    number = 1
+    while unique_name in used:
+        unique_name = f"{PurePosixPath(name).stem} ({number}){PurePosixPath(name).suffix}"
+        number += 1
+
+    used.add(unique_name)
+    return unique_name
+
+
+def _entries(parent: Object, path: str) -> Iterator[_Entry]:
+    names: set[str] = set()
+
+    # One property query per object: portable_device_api doesn't expose the
+    # bulk property interface (IPortableDevicePropertiesBulk), so this is as
+    # close to a bulk query as we get
+    for child in parent.children():
+        properties = child.get_properties(_entry_keys)
+        entry = _Entry(child, f"{path}{_unique_name(_Entry.name(properties), names)}", properties)
+        yield entry
+
+        if entry.is_directory:
+            yield from _entries(child, f"{entry.path}/")
+
+
+class _TarWriter:
+    def __init__(self, fileobj: BinaryIO, compression: str):
+        # Stream mode (`|`) writes sequentially and works with non-seekable
+        # outputs
+        self._tar = tarfile.open(fileobj = fileobj, mode = f"w|{compression}")
+
+    def add(self, entry: _Entry, chunk_size, progress):
+        info = tarfile.TarInfo(entry.path)
+        info.mtime = entry.mtime
+
+        if entry.is_directory:
+            info.type = tarfile.DIRTYPE
+            info.mode = 0o755
+            self._tar.addfile(info)
+        elif entry.size is not None:
+            info.size = entry.size
+            info.mode = 0o644
+            chunks = entry.object.download(chunk_size, progress = progress, size = entry.size)
+            with closing(_DownloadReader(chunks)) as reader:
+                self._tar.addfile(info, reader)
+        else:
+            # The tar header needs the size before the data
+            content = entry.object.download_all(chunk_size, progress = progress)
+            info.size = len(content)
+            info.mode = 0o644
+            self._tar.addfile(info, io.BytesIO(content))
+
+    def close(self):
+        self._tar.close()
+
+
+class _ZipWriter:
+    def __init__(self, fileobj: BinaryIO):
+        self._zip = zipfile.ZipFile(fileobj, mode = "w", compression = zipfile.ZIP_DEFLATED)
+
+    def add(self, entry: _Entry, chunk_size, progress):
+        date_time = max(time.localtime(entry.mtime)[:6], (1980, 1, 1, 0, 0, 0))
+
+        if entry.is_directory:
+            info = zipfile.ZipInfo(f"{entry.path}/", date_time)
+            self._zip.writestr(info, b"")
+        else:
+            info = zipfile.ZipInfo(entry.path, date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            # Without the size, we don't know whether we need ZIP64
+            force_zip64 = entry.size is None or entry.size >= zipfile.ZIP64_LIMIT
+            info.file_size = entry.size or 0
+            with self._zip.open(info, "w", force_zip64 = force_zip64) as file:
+                for chunk in entry.object.download(chunk_size, progress = progress, size = entry.size):
+                    file.write(chunk)
+
+    def close(self):
+        self._zip.close()
+
+
+def write_archive(source: Object, fileobj: BinaryIO, format: str = "zip", *,
+                  chunk_size: int | AdaptiveChunkSize | None = None,
+                  progress: ProgressCallback | None = None) -> list[str]:
+    """Writes the subtree below `source` (not including `source` itself) to an
+    archive, in one sequential pass. The content of each file is streamed from
+    the device into the archive, without a temporary copy.
+
+    The properties of each object are fetched with a single query, but there
+    is one query per object (no bulk query across objects).
+
+    `format` is one of `formats`. Returns the paths of the archive members.
+    `progress` is called for each file, see Object.download."""
+    if format == "zip":
+        writer = _ZipWriter(fileobj)
+    elif format in ("tar", "tar.gz"):
+        writer = _TarWriter(fileobj, "gz" if format == "tar.gz" else "")
+    else:
+        raise ValueError(f"Unsupported archive format: {format!r}")
+
+    paths = []
+    try:
+        for entry in _entries(source, ""):
+            writer.add(entry, chunk_size, progress)
+            paths.append(entry.path)
+    finally:
+        writer.close()
+
+    return paths
@@ -0,0 +1,125 @@
+class ChunkSizer:
+    """Determines the chunk size for a single transfer. The transfer calls
+    `record` after each chunk and `finish` after the last one."""
+
+    def __init__(self, chunk_size: int):
+        self._chunk_size = chunk_size
+
+    @property
+    def chunk_size(self) -> int:
+        return self._chunk_size
+
+    def record(self, num_bytes: int, seconds: float):
+        pass
+
+    def finish(self):
+        pass
+
+
+class _AdaptiveChunkSizer(ChunkSizer):
+    def __init__(self, policy: "AdaptiveChunkSize", device_id: str, initial: int):
+        super().__init__(policy.clamp(policy.best_chunk_size(device_id) or initial))
+        self._policy = policy
+        self._device_id = device_id
+
+        self._direction = 1
+        self._previous_throughput: float | None = None
+        self._best_chunk_size = self._chunk_size
+        self._best_throughput = 0.0
+
+        self._window_bytes = 0
+        self._window_seconds = 0.0
+        self._window_chunks = 0
+
+    def record(self, num_bytes: int, seconds: float):
+        self._window_bytes += num_bytes
+        self._window_seconds += seconds
+        self._window_chunks += 1
+
+        if self._window_chunks < self._policy.window:
+            return
+
+        if self._window_seconds > 0:
+            throughput = self._window_bytes / self._window_seconds
+        else:
+            throughput = float("inf")
+
+        self._window_bytes = 0
+        self._window_seconds = 0.0
+        self._window_chunks = 0
+
+        if throughput > self._best_throughput:
+            self._best_chunk_size = self._chunk_size
+            self._best_throughput = throughput
+
+        # Hill climbing: keep going in the same direction while the throughput
+        # improves, turn around when it gets worse
+        if self._previous_throughput is not None and throughput < self._previous_throughput:
+            self._direction = -self._direction
+        self._previous_throughput = throughput
+
+        chunk_size = self._policy.step(self._chunk_size, self._direction)
+        if chunk_size == self._chunk_size:
+            # Hit a bound
+            self._direction = -self._direction
+            chunk_size = self._policy.step(self._chunk_size, self._direction)
+        self._chunk_size = chunk_size
+
+    def finish(self):
+        if self._best_throughput > 0:
+            self._policy.remember(self._device_id, self._best_chunk_size)
+
+
+class AdaptiveChunkSize:
+    """Chunk size policy that measures the throughput of each chunk and grows
+    or shrinks the chunk size within [minimum, maximum] during a transfer.
+
+    The best chunk size found is remembered per device ID and used as the
+    starting point for later transfers with the same policy instance, so reuse
+    the instance across transfers."""
+
+    def __init__(self, *, minimum: int = 16 * 1024, maximum: int = 16 * 1024 * 1024,
+                 factor: float = 2.0, window: int = 4):
+        if not 0 < minimum <= maximum:
+            raise ValueError(f"Invalid chunk size bounds: {minimum}..{maximum}")
+        if factor <= 1:
+            raise ValueError(f"Invalid chunk size factor: {factor}")
+        if window < 1:
+            raise ValueError(f"Invalid window: {window}")
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.window = window
+
+        self._best_chunk_sizes: dict[str, int] = {}
+
+    def clamp(self, chunk_size: int) -> int:
+        return max(self.minimum, min(self.maximum, chunk_size))
+
+    def step(self, chunk_size: int, direction: int) -> int:
+        return self.clamp(round(chunk_size * self.factor ** direction))
+
+    def best_chunk_size(self, device_id: str) -> int | None:
+        return self._best_chunk_sizes.get(device_id)
+
+    def remember(self, device_id: str, chunk_size: int):
+        self._best_chunk_sizes[device_id] = chunk_size
+
+    def sizer(self, device_id: str, optimal_transfer_size: int) -> ChunkSizer:
+        return _AdaptiveChunkSizer(self, device_id, optimal_transfer_size)
+
+
+def chunk_sizer(chunk_size: int | AdaptiveChunkSize | None, device_id: str, optimal_transfer_size: int) \
+        -> ChunkSizer:
+    """Creates the chunk sizer for a single transfer:
+      * None: the optimal transfer size reported by the driver
+      * int: a fixed chunk size
+      * AdaptiveChunkSize: adapt the chunk size during the transfer
+    """
+    if chunk_size is None:
+        return ChunkSizer(optimal_transfer_size)
+    elif isinstance(chunk_size, AdaptiveChunkSize):
+        return chunk_size.sizer(device_id, optimal_transfer_size)
+    else:
+        return ChunkSizer(chunk_size)
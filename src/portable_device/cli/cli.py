@@ -1,16 +1,20 @@
 import sys
 
 import cyclopts
-from portable_device_api import definitions
 
-from portable_device import Device
 from portable_device.exceptions import DeviceNotFound
 
+# portable_device (and with it, comtypes and portable_device_api) is only
+# imported in the commands that need it, so that the CLI starts quickly, e. g.
+# for `--help`.
+
 cyclopts_app = cyclopts.App()
 
 
 @cyclopts_app.command()
 def devices():
+    from portable_device import Device
+
     print(f"{'Description':<25}{'Friendly name':<25}{'Manufacturer':<25}")
     print(f"{'-----------':<25}{'-------------':<25}{'------------':<25}")
 
@@ -50,6 +54,9 @@ def devices():
 
 @cyclopts_app.command()
 def ls(device_description: str):
+    from portable_device_api import definitions
+    from portable_device import Device
+
     try:
         with Device.by_description(device_description) as device:
             # TODO no fixed width
@@ -59,12 +66,15 @@ def ls(device_description: str):
             for depth, object_ in device.walk():
                 oid = object_._object_id
 
-                content_type, object_name, file_name = object_.get_properties([
+                properties = object_.get_properties([
                     definitions.WPD_OBJECT_CONTENT_TYPE,
                     definitions.WPD_OBJECT_NAME,
                     definitions.WPD_OBJECT_ORIGINAL_FILE_NAME,
-                ]).values()
+                ])
+                content_type = properties.get(definitions.WPD_OBJECT_CONTENT_TYPE, "")
                 content_type = definitions.reverse_lookup.get(content_type, content_type)
+                object_name = properties.get(definitions.WPD_OBJECT_NAME, "")
+                file_name = properties.get(definitions.WPD_OBJECT_ORIGINAL_FILE_NAME, "")
 
                 print(f"{'  ' * depth}{oid:<55}{content_type:<42}{object_name:<40}{file_name:<45}")
                 # _dump_properties(properties, oid, depth + 1)
@@ -73,5 +83,36 @@ def ls(device_description: str):
         return 1
 
 
+def _archive_format(output: str) -> str:
+    for format_ in ("tar.gz", "tar", "zip"):
+        if output.endswith(f".{format_}"):
+            return format_
+    return "zip"
+
+
+@cyclopts_app.command()
+def archive(device_description: str, output: str, path: str = "", *, format: str | None = None):
+    """Writes the objects below `path` (separated by "/", starting with the
+    name of the root object) to a zip or tar archive. The format is determined
+    from the extension of `output`, unless specified."""
+    from portable_device import Device
+    from portable_device.archive import write_archive
+
+    if format is None:
+        format = _archive_format(output)
+
+    try:
+        with Device.by_description(device_description) as device:
+            source = device.object_by_path(part for part in path.split("/") if part)
+
+            with open(output, "wb") as file:
+                paths = write_archive(source, file, format)
+
+            print(f"Archived {len(paths)} entries to {output}")
+    except DeviceNotFound as e:
+        print(e)
+        return 1
+
+
 if __name__ == "__main__":
     sys.exit(cyclopts_app())
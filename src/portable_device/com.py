@@ -0,0 +1,39 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+import threading
+
+# COM objects that are cached for reuse must be cached per thread: an object
+# must not be used from a different apartment than the one it was created in
+# (e. g. on a DevicePool worker). The cache of a worker thread is cleared
+# before COM is uninitialized on that thread (see `apartment`).
+thread_cache = threading.local()
+
+
+def initialize_com():
+    """Initializes COM for the current (non-main) thread. We use the
+    multithreaded apartment, so objects created on the thread don't need a
+    message loop."""
+    import comtypes
+
+    comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)
+
+
+def uninitialize_com():
+    """Releases the objects in `thread_cache` and uninitializes COM for the
+    current thread. COM objects created on the thread must not be used
+    afterwards."""
+    import comtypes
+
+    thread_cache.__dict__.clear()
+    comtypes.CoUninitialize()
+
+
+@contextmanager
+def apartment() -> Iterator[None]:
+    """Initializes COM for the current (non-main) thread for the duration of
+    the block"""
+    initialize_com()
+    try:
+        yield
+    finally:
+        uninitialize_com()
@@ -0,0 +1,123 @@
+from collections.abc import Iterator
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Self
+
+algorithm = "sha256"
+
+
+class ContentHasher:
+    """Computes the prefix hash and the full hash of content incrementally, as
+    it is transferred. The prefix hash covers the first `prefix_size` bytes
+    (or all of the content, if it is shorter)."""
+
+    def __init__(self, prefix_size: int):
+        self.prefix_size = prefix_size
+        self.size = 0
+
+        self._prefix = hashlib.new(algorithm)
+        self._full = hashlib.new(algorithm)
+
+    def update(self, data: bytes):
+        if self.size < self.prefix_size:
+            self._prefix.update(data[:self.prefix_size - self.size])
+        self._full.update(data)
+        self.size += len(data)
+
+    def prefix_hash(self) -> str:
+        return self._prefix.hexdigest()
+
+    def full_hash(self) -> str:
+        return self._full.hexdigest()
+
+
+class ContentIndex:
+    """The sizes and hashes of known content, e. g. of the files in a local
+    library, for recognizing duplicates on a device without transferring them.
+
+    Each entry has the size, the prefix hash and the full hash of the content
+    (see ContentHasher). Sizes are cheap to get from the device, prefix hashes
+    need a partial read, and full hashes need a complete transfer, so the
+    entries are looked up in that order."""
+
+    def __init__(self, *, prefix_size: int = 64 * 1024):
+        self.prefix_size = prefix_size
+
+        # Size -> prefix hash -> full hashes
+        self._entries: dict[int, dict[str, set[str]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(full_hashes) for prefixes in self._entries.values() for full_hashes in prefixes.values())
+
+    def __iter__(self) -> Iterator[tuple[int, str, str]]:
+        for size, prefixes in self._entries.items():
+            for prefix_hash, full_hashes in prefixes.items():
+                for full_hash in full_hashes:
+                    yield size, prefix_hash, full_hash
+
+    def hasher(self) -> ContentHasher:
+        return ContentHasher(self.prefix_size)
+
+    def add(self, size: int, prefix_hash: str, full_hash: str):
+        self._entries.setdefault(size, {}).setdefault(prefix_hash, set()).add(full_hash)
+
+    def add_hasher(self, hasher: ContentHasher):
+        """Adds the content that was passed to `hasher`"""
+        if hasher.prefix_size != self.prefix_size:
+            raise ValueError(f"Prefix size {hasher.prefix_size} doesn't match index ({self.prefix_size})")
+        self.add(hasher.size, hasher.prefix_hash(), hasher.full_hash())
+
+    def add_file(self, path: str | os.PathLike, *, chunk_size: int = 1024 * 1024):
+        """Adds the content of a local file"""
+        hasher = self.hasher()
+        with open(path, "rb") as file:
+            while chunk := file.read(chunk_size):
+                hasher.update(chunk)
+        self.add_hasher(hasher)
+
+    def has_size(self, size: int) -> bool:
+        return size in self._entries
+
+    def has_prefix(self, size: int, prefix_hash: str) -> bool:
+        return prefix_hash in self._entries.get(size, {})
+
+    def has_content(self, size: int, full_hash: str) -> bool:
+        return any(full_hash in full_hashes for full_hashes in self._entries.get(size, {}).values())
+
+    # Persistence ##############################################################
+
+    def save(self, path: str | os.PathLike):
+        # Write to a temporary file first, so an interruption doesn't destroy
+        # the existing index
+        path = Path(path)
+        temporary_path = path.with_name(path.name + ".tmp")
+        with open(temporary_path, "w", encoding = "utf-8") as file:
+            json.dump({
+                "algorithm": algorithm,
+                "prefix_size": self.prefix_size,
+                "entries": list(self),
+            }, file)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike, *, prefix_size: int = 64 * 1024) -> Self:
+        """Loads an index saved by `save`. If the file doesn't exist, the index
+        is empty and uses `prefix_size`; otherwise, the prefix size of the
+        saved index is used."""
+        path = Path(path)
+        if not path.exists():
+            return cls(prefix_size = prefix_size)
+
+        with open(path, "r", encoding = "utf-8") as file:
+            data = json.load(file)
+
+        if data["algorithm"] != algorithm:
+            raise ValueError(f"Unsupported hash algorithm: {data['algorithm']!r}")
+
+        index = cls(prefix_size = data["prefix_size"])
+        for size, prefix_hash, full_hash in data["entries"]:
+            index.add(size, prefix_hash, full_hash)
+
+        return index
@@ -0,0 +1,145 @@
+from collections.abc import Iterable
+from contextlib import closing
+from dataclasses import dataclass
+import os
+from pathlib import Path
+
+from portable_device import Object
+from portable_device._api import definitions
+from portable_device.chunk_size import AdaptiveChunkSize
+from portable_device.content_index import ContentIndex, ContentHasher
+from portable_device.progress import ProgressCallback
+
+# All properties needed to decide whether to transfer an object are queried at
+# once, before anything is transferred
+_keys = (
+    definitions.WPD_OBJECT_CONTENT_TYPE,
+    definitions.WPD_OBJECT_NAME,
+    definitions.WPD_OBJECT_ORIGINAL_FILE_NAME,
+    definitions.WPD_OBJECT_SIZE,
+)
+
+_container_types = (
+    definitions.WPD_CONTENT_TYPE_FOLDER,
+    definitions.WPD_CONTENT_TYPE_FUNCTIONAL_OBJECT,
+)
+
+
+@dataclass
+class IngestResult:
+    object: Object
+    file_name: str
+    size: int | None
+    # The local file, or None if the content was already known
+    path: Path | None = None
+    full_hash: str | None = None
+
+    @property
+    def duplicate(self) -> bool:
+        return self.path is None
+
+
+def _read_prefix(object_: Object, hasher: ContentHasher) -> bytes:
+    """Reads the first `hasher.prefix_size` bytes of the object (fewer if it
+    is shorter) and passes them to `hasher`. The rest of the content is not
+    transferred."""
+    prefix = bytearray()
+
+    # A fixed chunk size, so that a single read usually suffices
+    with closing(object_.download(hasher.prefix_size)) as chunks:
+        for chunk in chunks:
+            chunk = chunk[:hasher.prefix_size - len(prefix)]
+            prefix.extend(chunk)
+            if len(prefix) >= hasher.prefix_size:
+                break
+
+    hasher.update(prefix)
+    return bytes(prefix)
+
+
+def _unique_path(directory: Path, file_name: str) -> Path:
+    path = directory / file_name
+    number = 1
+    while path.exists():
+        path = directory / f"{Path(file_name).stem} ({number}){Path(file_name).suffix}"
+        number += 1
+    return path
+
+
+def ingest(objects: Iterable[Object], directory: str | os.PathLike, index: ContentIndex, *,
+           chunk_size: int | AdaptiveChunkSize | None = None,
+           progress: ProgressCallback | None = None,
+           trust_prefix: bool = False) -> list[IngestResult]:
+    """Downloads the objects into `directory`, except those whose content is
+    already in `index`. Downloaded content is added to `index`, so duplicates
+    among `objects` are also only downloaded once. Folders are skipped (use,
+    e. g., Object.walk to ingest a subtree).
+
+    The sizes of all objects are queried first. An object whose size is not
+    in the index is new, and is downloaded without further checks. An object
+    that is not larger than the prefix size is read completely with the
+    prefix, and skipped if its content is in the index. Any other object is
+    downloaded and the full hash, which is computed while downloading, is
+    compared; if it is in the index, the downloaded data is discarded. The
+    same applies to objects without a size. So with the defaults, duplicates
+    that are larger than the prefix size are still transferred, only not
+    stored.
+
+    If `trust_prefix` is true, content with the same size and prefix hash as
+    known content is considered known, so duplicates are never transferred:
+    on a size collision, only the prefix is read (and the object skipped if
+    the prefix hash is in the index, or else downloaded after the prefix).
+    Note that the rest of the content is then not compared, so different
+    files that only differ after the prefix are skipped as well.
+
+    Local files are not overwritten; if a file with the same name exists, a
+    number is appended. Returns a result for each file object."""
+    directory = Path(directory)
+    directory.mkdir(parents = True, exist_ok = True)
+
+    candidates = []
+    for object_ in objects:
+        properties = object_.get_properties(_keys)
+        if properties.get(definitions.WPD_OBJECT_CONTENT_TYPE) in _container_types:
+            continue
+
+        file_name = (properties.get(definitions.WPD_OBJECT_ORIGINAL_FILE_NAME)
+                     or properties.get(definitions.WPD_OBJECT_NAME)
+                     or object_.object_id).replace("/", "_").replace("\\", "_")
+        candidates.append(IngestResult(object_, file_name, properties.get(definitions.WPD_OBJECT_SIZE)))
+
+    for result in candidates:
+        hasher = index.hasher()
+
+        prefix = b""
+        if (result.size is not None and index.has_size(result.size)
+                and (trust_prefix or result.size <= index.prefix_size)):
+            prefix = _read_prefix(result.object, hasher)
+            if result.size <= index.prefix_size:
+                # The prefix is all of the content, so the full hash is exact
+                if index.has_content(result.size, hasher.full_hash()):
+                    continue
+            elif index.has_prefix(result.size, hasher.prefix_hash()):
+                continue
+
+        path = _unique_path(directory, result.file_name)
+        # Write to a temporary file first, so an interrupted download doesn't
+        # leave a partial file in the library
+        temporary_path = path.with_name(path.name + ".part")
+        with open(temporary_path, "wb") as file:
+            file.write(prefix)
+            chunks = result.object.download(chunk_size, progress = progress, offset = len(prefix), size = result.size)
+            for chunk in chunks:
+                hasher.update(chunk)
+                file.write(chunk)
+
+        result.full_hash = hasher.full_hash()
+        if index.has_content(hasher.size, result.full_hash):
+            temporary_path.unlink()
+            continue
+
+        os.replace(temporary_path, path)
+        index.add_hasher(hasher)
+        result.path = path
+
+    return candidates
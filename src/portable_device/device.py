@@ -1,21 +1,45 @@
+from __future__ import annotations
+
 from collections.abc import Iterator, Callable, Iterable
-from functools import cache
-from portable_device_api import (PortableDeviceManager, PortableDevice, PortableDeviceContent, PortableDeviceProperties,
-                                 definitions)
-from typing import Self
+from functools import cached_property
+from typing import TYPE_CHECKING, Self
 
-from portable_device import Object, ObjectList
+from portable_device import Object, LazyObjectList
+from portable_device._api import VT_LPWSTR, definitions
+from portable_device.com import thread_cache
+from portable_device.events import EventCallback, EventSource, EventSubscription, WpdEventSource
 from portable_device.exceptions import DeviceNotFound, AmbiguousDevice, ObjectNotFound, AmbiguousObject
+from portable_device.persistent_id_index import PersistentIdIndex
+from portable_device.property_values import key_collection
+
+if TYPE_CHECKING:  # pragma: no cover
+    from portable_device_api import (PortableDeviceManager, PortableDevice, PortableDeviceContent,
+                                     PortableDeviceProperties, PortableDeviceKeyCollection, PortableDeviceValues,
+                                     PortableDevicePropVariantCollection, PropertyKey)
 
 
-@cache
 def _manager() -> PortableDeviceManager:
-    return PortableDeviceManager.create()
+    """The manager of the current thread, see portable_device.com.thread_cache"""
+    try:
+        return thread_cache.manager
+    except AttributeError:
+        from portable_device_api import PortableDeviceManager
+
+        thread_cache.manager = PortableDeviceManager.create()
+        return thread_cache.manager
 
 
 class Device:
-    def __init__(self, device_id: str):
+    def __init__(self, device_id: str, *, api_device: PortableDevice | None = None):
+        """`api_device` is used instead of creating a PortableDevice, e. g. to
+        record or replay a session (see portable_device.recording and
+        portable_device.replay)"""
         self._device_id = device_id
+        self._api_device = api_device
+
+        # Replace with PersistentIdIndex.load(...) to reuse an index from an
+        # earlier session
+        self.persistent_id_index = PersistentIdIndex()
 
     # Creation #################################################################
 
@@ -79,56 +103,96 @@ class Device:
         """Can be accessed without opening the device"""
         return self._device_id
 
-    @property
-    @cache
+    # Cached on the instance (rather than with `cache`, which would keep the
+    # instance alive)
+
+    @cached_property
     def description(self) -> str:
         """Can be accessed without opening the device"""
         return _manager().get_device_description(self._device_id)
 
-    @property
-    @cache
+    @cached_property
     def friendly_name(self) -> str:
         """Can be accessed without opening the device"""
         return _manager().get_device_friendly_name(self._device_id)
 
-    @property
-    @cache
+    @cached_property
     def manufacturer(self) -> str:
         """Can be accessed without opening the device"""
         return _manager().get_device_manufacturer(self._device_id)
 
-    @property
-    @cache
+    # The COM objects are cached on the instance, so they are released with
+    # the Device, or explicitly with `release`
+
+    @cached_property
     def _device(self):
+        if self._api_device is not None:
+            return self._api_device
+
+        from portable_device_api import PortableDevice
+
         return PortableDevice.create()
 
-    @property
-    @cache
+    @cached_property
     def _content(self) -> PortableDeviceContent:
         return self._device.content()
 
-    @property
-    @cache
+    @cached_property
     def _properties(self) -> PortableDeviceProperties:
         return self._content.properties()
 
+    def release(self):
+        """Releases the device's COM objects, e. g. before COM is uninitialized
+        on the current thread (see portable_device.com.apartment). Close the
+        device first. The objects are created again if the device is used
+        afterwards."""
+        for name in ("_properties", "_content", "_device"):
+            self.__dict__.pop(name, None)
+
+    # API objects ##############################################################
+
+    # The values that are passed to the device are created here, so a Device
+    # that doesn't use portable_device_api (see portable_device.replay) can
+    # substitute them
+
+    def _key_collection(self, keys: tuple[PropertyKey, ...]) -> PortableDeviceKeyCollection:
+        """See property_values.key_collection; the result must not be
+        modified"""
+        return key_collection(keys)
+
+    def _values(self) -> PortableDeviceValues:
+        from portable_device_api import PortableDeviceValues
+
+        return PortableDeviceValues.create()
+
+    def _string_collection(self, strings: Iterable[str]) -> PortableDevicePropVariantCollection:
+        from portable_device_api import PortableDevicePropVariantCollection, PropVariant
+
+        collection = PortableDevicePropVariantCollection.create()
+        for string in strings:
+            collection.add(PropVariant.create(VT_LPWSTR, string))
+        return collection
+
     # Object access ############################################################
 
+    # Not cached: the Object refers to the Device, so caching it on the
+    # instance would create a reference cycle
     @property
-    @cache
     def device_object(self) -> Object:
         return Object(self, definitions.WPD_DEVICE_OBJECT_ID)
 
-    def root_objects(self) -> ObjectList:
+    def root_objects(self) -> LazyObjectList:
         return self.device_object.children()
 
-    def root_object(self, name: str) -> Object:
+    def root_object(self, name: str, *, unique: bool = True) -> Object:
+        """See ObjectSequence.find for `unique`"""
         if name:
             # Select root object by name
-            return self.root_objects().by_object_name(name)
+            return self.root_objects().by_object_name(name, unique = unique)
         else:
-            # Select the only root object
-            root_objects = self.root_objects()
+            # Select the only root object. We only need to enumerate two root
+            # objects to know whether it is unique.
+            root_objects = self.root_objects()[:2]
             if len(root_objects) == 0:
                 raise ObjectNotFound("root object")
             elif len(root_objects) == 1:
@@ -136,15 +200,103 @@ class Device:
             else:
                 raise AmbiguousObject("root object")
 
-    def object_by_path(self, path: Iterable[str]) -> Object:
+    def object_by_path(self, path: Iterable[str], *, unique: bool = True) -> Object:
+        """See Object.child_by_path for `unique`, which applies to all path
+        components"""
         path = list(path)
         if path:
             root_name = path[0]
             child_path = path[1:]
 
-            return self.root_object(root_name).child_by_path(child_path)
+            return self.root_object(root_name, unique = unique).child_by_path(child_path, unique = unique)
         else:
             return self.device_object
 
     def walk(self) -> Iterator[tuple[int, Object]]:
         yield from self.device_object.walk(depth = 0)
+
+    # Persistent unique IDs ####################################################
+
+    def index_persistent_ids(self, root: Object | None = None) -> int:
+        """Adds the persistent unique IDs of all objects below `root` (default:
+        all objects), including `root` itself, to `persistent_id_index`.
+        Returns the number of objects added.
+
+        This makes one property query per object: portable_device_api doesn't
+        expose the bulk property interface (IPortableDevicePropertiesBulk). To
+        look up a known set of persistent IDs, objects_by_persistent_ids is
+        much cheaper."""
+        if root is None:
+            root = self.device_object
+
+        count = 0
+        for _, object_ in root.walk():
+            persistent_id = object_.persistent_unique_id()
+            if persistent_id:
+                self.persistent_id_index.add(persistent_id, object_.object_id)
+                count += 1
+        return count
+
+    def _object_ids_from_persistent_ids(self, persistent_ids: list[str]) -> list[str]:
+        """Looks up the object IDs on the device, in a single call. The result
+        contains an empty string for unknown persistent IDs."""
+        persistent_ids_pvc = self._string_collection(persistent_ids)
+        object_ids = self._content.get_object_ids_from_persistent_unique_ids(persistent_ids_pvc)
+        assert object_ids.get_count() == len(persistent_ids)
+        return [object_ids.get_at(i).value for i in range(object_ids.get_count())]
+
+    def objects_by_persistent_ids(self, persistent_ids: Iterable[str]) -> dict[str, Object | None]:
+        """Returns the objects with the given persistent unique IDs (None for
+        objects that don't exist).
+
+        Objects with verified entries in `persistent_id_index` are returned
+        without accessing the device. All other objects, including those with
+        entries from an earlier session (which may be outdated), are looked up
+        on the device in a single call, and the index is updated."""
+        persistent_ids = list(dict.fromkeys(persistent_ids))
+        index = self.persistent_id_index
+
+        objects: dict[str, Object | None] = {}
+        lookups = []
+        for persistent_id in persistent_ids:
+            if index.is_verified(persistent_id):
+                objects[persistent_id] = Object(self, index.get(persistent_id))
+            else:
+                lookups.append(persistent_id)
+
+        if lookups:
+            for persistent_id, object_id in zip(lookups, self._object_ids_from_persistent_ids(lookups)):
+                if object_id:
+                    index.add(persistent_id, object_id)
+                    objects[persistent_id] = Object(self, object_id)
+                else:
+                    index.discard(persistent_id)
+                    objects[persistent_id] = None
+
+        return {persistent_id: objects[persistent_id] for persistent_id in persistent_ids}
+
+    def object_by_persistent_id(self, persistent_id: str) -> Object:
+        """See objects_by_persistent_ids"""
+        object_ = self.objects_by_persistent_ids([persistent_id])[persistent_id]
+        if object_ is None:
+            raise ObjectNotFound(repr(persistent_id))
+        return object_
+
+    # Events ###################################################################
+
+    def subscribe(self, callback: EventCallback | None = None, *,
+                  source: EventSource | None = None) -> EventSubscription:
+        """Subscribes to the events of the device (objects added, removed or
+        updated; device removed). The device must be open.
+
+        If `callback` is given, it is called for each event on a background
+        thread; otherwise, iterate over the subscription. Close the
+        subscription (or use it as a context manager) to stop receiving
+        events.
+
+        By default, the events are received from the device. Pass a different
+        `source` (e. g. a LocalEventSource) to supply events otherwise."""
+        if source is None:
+            source = WpdEventSource(self)
+
+        return EventSubscription(source, callback)
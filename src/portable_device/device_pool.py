@@ -0,0 +1,93 @@
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+from portable_device import Device
+from portable_device.com import apartment
+
+T = TypeVar("T")
+
+
+@dataclass
+class DeviceResult(Generic[T]):
+    """The outcome of running a function for one device: either `result` or
+    `error` (the exception raised by the function) is set"""
+    device_id: str
+    result: T | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def get(self) -> T:
+        """Returns the result, or raises the error"""
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class DevicePool:
+    """Runs a function for multiple devices concurrently, each device on its
+    own COM-initialized worker thread.
+
+    A new Device instance is created on the worker thread for each device, and
+    COM is initialized for the duration of each call, so `function` must not
+    return objects that are backed by COM objects (e. g. Object). At most
+    `max_workers` devices are processed at the same time (default: all of
+    them)."""
+
+    def __init__(self, devices: Iterable[Device | str], *, max_workers: int | None = None):
+        device_ids = (d.device_id if isinstance(d, Device) else d for d in devices)
+        self._device_ids = list(dict.fromkeys(device_ids))
+        self._max_workers = max_workers
+
+    @classmethod
+    def all(cls, *, refresh = True, max_workers: int | None = None) -> "DevicePool":
+        return cls(Device.all(refresh = refresh), max_workers = max_workers)
+
+    @property
+    def device_ids(self) -> list[str]:
+        return list(self._device_ids)
+
+    @staticmethod
+    def _run_one(function: Callable[[Device], T], device_id: str, open_: bool) -> T:
+        with apartment():
+            device = Device(device_id)
+            try:
+                if open_:
+                    with device:
+                        return function(device)
+                else:
+                    return function(device)
+            finally:
+                # Release the device's COM objects before the apartment is
+                # torn down, even if `function` kept references to the device
+                device.release()
+
+    def iter_results(self, function: Callable[[Device], T], *, open: bool = True) -> Iterator[DeviceResult[T]]:
+        """Yields the result for each device as soon as it is available. If
+        `open` is true, the device is opened before calling `function` and
+        closed afterwards."""
+        if not self._device_ids:
+            return
+
+        max_workers = self._max_workers or len(self._device_ids)
+        with ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = "portable_device pool") as executor:
+            futures = {executor.submit(self._run_one, function, device_id, open): device_id
+                       for device_id in self._device_ids}
+
+            for future in as_completed(futures):
+                device_id = futures[future]
+                try:
+                    yield DeviceResult(device_id, result = future.result())
+                except Exception as e:
+                    yield DeviceResult(device_id, error = e)
+
+    def run(self, function: Callable[[Device], T], *, open: bool = True) -> dict[str, DeviceResult[T]]:
+        """Runs `function` for each device and returns the results by device ID,
+        in the order of the devices. Exceptions raised by `function` are stored
+        in the result rather than propagated."""
+        results = {result.device_id: result for result in self.iter_results(function, open = open)}
+        return {device_id: results[device_id] for device_id in self._device_ids}
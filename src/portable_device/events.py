@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from enum import Enum
+import queue
+import threading
+from typing import TYPE_CHECKING, Any
+
+from portable_device._api import definitions
+from portable_device.property_values import PropertyValues
+
+if TYPE_CHECKING:  # pragma: no cover
+    from portable_device_api import PortableDeviceValues
+    from portable_device import Device
+
+
+class EventKind(Enum):
+    OBJECT_ADDED = "object_added"
+    OBJECT_REMOVED = "object_removed"
+    OBJECT_UPDATED = "object_updated"
+    DEVICE_REMOVED = "device_removed"
+    OTHER = "other"
+
+
+@dataclass(frozen = True)
+class DeviceEvent:
+    """An event reported by a device. The object-related fields are None if
+    the device didn't report them (e. g. for DEVICE_REMOVED)."""
+    kind: EventKind
+    object_id: str | None = None
+    parent_id: str | None = None
+    persistent_unique_id: str | None = None
+    event_id: Any = None
+
+
+EventCallback = Callable[[DeviceEvent], None]
+
+
+class EventSource(ABC):
+    """Produces events for a subscription. `start` is called once with the
+    function to deliver events to (which may be called from any thread), and
+    `stop` once when the subscription is closed."""
+
+    @abstractmethod
+    def start(self, deliver: EventCallback):
+        ...
+
+    @abstractmethod
+    def stop(self):
+        ...
+
+
+class WpdEventSource(EventSource):
+    """Receives events from an open device through WPD event registration
+    (IPortableDevice::Advise)"""
+
+    _event_kinds = {
+        definitions.WPD_EVENT_OBJECT_ADDED: EventKind.OBJECT_ADDED,
+        definitions.WPD_EVENT_OBJECT_REMOVED: EventKind.OBJECT_REMOVED,
+        definitions.WPD_EVENT_OBJECT_UPDATED: EventKind.OBJECT_UPDATED,
+        definitions.WPD_EVENT_DEVICE_REMOVED: EventKind.DEVICE_REMOVED,
+    }
+
+    _keys = (
+        definitions.WPD_EVENT_PARAMETER_EVENT_ID,
+        definitions.WPD_OBJECT_ID,
+        definitions.WPD_OBJECT_PARENT_ID,
+        definitions.WPD_OBJECT_PERSISTENT_UNIQUE_ID,
+    )
+
+    def __init__(self, device: Device):
+        self._device = device
+        self._cookie: str | None = None
+
+    @classmethod
+    def decode(cls, values: PortableDeviceValues) -> DeviceEvent:
+        properties = PropertyValues.decode(cls._keys, values)
+        event_id = properties.get(definitions.WPD_EVENT_PARAMETER_EVENT_ID)
+
+        return DeviceEvent(
+            kind = cls._event_kinds.get(event_id, EventKind.OTHER),
+            object_id = properties.get(definitions.WPD_OBJECT_ID),
+            parent_id = properties.get(definitions.WPD_OBJECT_PARENT_ID),
+            persistent_unique_id = properties.get(definitions.WPD_OBJECT_PERSISTENT_UNIQUE_ID),
+            event_id = event_id,
+        )
+
+    def start(self, deliver: EventCallback):
+        self._cookie = self._device._device.advise(lambda values: deliver(self.decode(values)))
+
+    def stop(self):
+        if self._cookie is not None:
+            self._device._device.unadvise(self._cookie)
+            self._cookie = None
+
+
+class LocalEventSource(EventSource):
+    """An event source whose events are emitted by calling `emit`, e. g. to
+    drive code that consumes events in tests"""
+
+    def __init__(self):
+        self._deliver: EventCallback | None = None
+
+    def start(self, deliver: EventCallback):
+        self._deliver = deliver
+
+    def stop(self):
+        self._deliver = None
+
+    def emit(self, event: DeviceEvent):
+        if self._deliver is not None:
+            self._deliver(event)
+
+
+_closed = object()
+
+
+class EventSubscription:
+    """A subscription to the events of a device.
+
+    If a callback is given, it is called for each event on a background thread.
+    Otherwise, iterate over the subscription to receive the events; iteration
+    ends when the subscription is closed.
+
+    Event sources may deliver events on arbitrary threads; the events are
+    queued, so neither the callback nor the iterator block the source.
+
+    If the callback raises an exception, the remaining events are still
+    delivered, and the first exception is raised again by `close`."""
+
+    def __init__(self, source: EventSource, callback: EventCallback | None = None):
+        self._source = source
+        self._callback = callback
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self._error: BaseException | None = None
+
+        # Start the source first, so no thread is left behind if that fails;
+        # events delivered before the thread starts are queued
+        source.start(self._queue.put)
+
+        if callback is not None:
+            self._thread = threading.Thread(target = self._dispatch, name = "portable_device events",
+                                            daemon = True)
+            self._thread.start()
+
+    def _dispatch(self):
+        for event in self._events():
+            try:
+                self._callback(event)
+            except Exception as e:
+                if self._error is None:
+                    self._error = e
+
+    def _events(self) -> Iterator[DeviceEvent]:
+        while (event := self._queue.get()) is not _closed:
+            yield event
+
+        # Keep the subscription closed for other consumers
+        self._queue.put(_closed)
+
+    def __iter__(self) -> Iterator[DeviceEvent]:
+        if self._callback is not None:
+            raise RuntimeError("Events are delivered to the callback")
+        return self._events()
+
+    def get(self, timeout: float | None = None) -> DeviceEvent | None:
+        """Returns the next event, or None if there is no event within
+        `timeout` seconds or the subscription has been closed"""
+        if self._callback is not None:
+            raise RuntimeError("Events are delivered to the callback")
+
+        try:
+            event = self._queue.get(timeout = timeout)
+        except queue.Empty:
+            return None
+
+        if event is _closed:
+            # Keep the subscription closed for other consumers
+            self._queue.put(_closed)
+            return None
+
+        return event
+
+    def close(self):
+        """Stops receiving events. If the callback raised an exception, the
+        first one is raised here."""
+        self._stop()
+        if self._error is not None:
+            raise self._error
+
+    def _stop(self):
+        if self._closed:
+            return
+        self._closed = True
+
+        try:
+            self._source.stop()
+        finally:
+            self._queue.put(_closed)
+            if self._thread is not None and self._thread is not threading.current_thread():
+                self._thread.join()
+
+    # Context manager ##########################################################
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't replace the exception from the body with the callback's;
+            # attach it as context instead
+            self._stop()
+            if self._error is not None and exc_val.__context__ is None:
+                exc_val.__context__ = self._error
@@ -1,21 +1,39 @@
 from __future__ import annotations
 
 from collections.abc import Iterator, Iterable, Sequence, Generator
-from functools import cache
+from functools import cached_property
+from time import perf_counter
 from typing import TYPE_CHECKING, Self
 
-from comtypes import COMError
-from comtypes.automation import VT_LPWSTR
-
-from portable_device_api import (definitions, PortableDeviceKeyCollection, PropertyKey, PortableDeviceValues,
-                                 PortableDevicePropVariantCollection, PropVariant, errors)
-
-from portable_device import ObjectList
+from portable_device import ObjectList, LazyObjectList
+from portable_device._api import COMError, definitions
+from portable_device.chunk_size import AdaptiveChunkSize, ChunkSizer, chunk_sizer
+from portable_device.progress import ProgressCallback, ProgressReporter, progress_reporter
+from portable_device.property_values import PropertyValues
 
 if TYPE_CHECKING:    # pragma: no cover
+    from portable_device_api import PropertyKey
     from portable_device import Device
 
 
+def _is_missing_resource(error: COMError) -> bool:
+    """Whether the error indicates that the requested resource does not exist
+    for the object (as opposed to, e. g., a communication error)"""
+    from portable_device_api import errors
+
+    return errors.to_hresult(error.hresult) in (errors.ERROR_NOT_FOUND, errors.ERROR_NOT_SUPPORTED)
+
+
+def _seek(stream, offset: int, chunk_size: int):
+    try:
+        stream.seek(offset)
+    except COMError:
+        # Seeking is not supported by many devices (E_NOTIMPL), skip the data
+        # instead
+        while offset > 0 and (chunk := stream.remote_read(min(offset, chunk_size))):
+            offset -= len(chunk)
+
+
 class Object:
     def __init__(self, device: Device, object_id: str):
         self._device = device
@@ -31,13 +49,11 @@ class Object:
     def object_id(self) -> str:
         return self._object_id
 
-    @property
-    @cache
+    @cached_property
     def _content(self):
         return self._device._content
 
-    @property
-    @cache
+    @cached_property
     def _properties(self):
         return self._device._properties
 
@@ -53,40 +69,28 @@ class Object:
           * get_string_value -> gets a string
           * get_value -> gets a PropVariant, use .value for the actual value
         """
-        key_collection = PortableDeviceKeyCollection.create()
-        for key in keys:
-            key_collection.add(key)
-
-        return self._properties.get_values(self._object_id, key_collection)
-
-    def get_properties(self, keys: Iterable[PropertyKey]):
-        keys = list(keys)
-
-        properties = self._get_properties(keys)
-
-        # TODO if the key is not in the collection (e. g. file name for device
-        # objects and root objects, or object name for device objects):
-        #   * property_values.get_string_value raises get COMError (-2147023728 = 0x80070490 = ERROR_NOT_FOUND)
-        #   * property_values.get_value returns -2147023728 instead, and v.VT is comtypes.automation.VT_ERROR
-        # We can't easily use the former without exposing PortableDeviceValues
-        # and PropVariant, and we don't want the latter. PortableDeviceValues
-        # has get_error_value, maybe we can use this (but does it distinguish
-        # an error from a regular integer-typed property?). Otherwise, we may
-        # have to use property_values.get_count and property_values.get_at
-        # (returns key, value) and check for presence ourselves.
-        # Also explain this in portable_device_api.PortableDeviceValues
-        # Or maybe we could embed the expected value in the PropertyKey
-        return {key: properties.get_value(key).value for key in keys}
-
-    def get_property(self, key: PropertyKey):
-        return self._get_properties([key]).get_value(key).value
-
-    def object_name(self) -> str:
+        return self._properties.get_values(self._object_id, self._device._key_collection(tuple(keys)))
+
+    def get_properties(self, keys: Iterable[PropertyKey]) -> PropertyValues:
+        """Properties that the object doesn't have are not contained in the
+        result, but listed in its `missing` attribute"""
+        keys = tuple(keys)
+        return PropertyValues.decode(keys, self._get_properties(keys))
+
+    def get_property(self, key: PropertyKey, default = None):
+        """Returns `default` if the object doesn't have the property"""
+        return self.get_properties([key]).get(key, default)
+
+    def object_name(self) -> str | None:
         return self.get_property(definitions.WPD_OBJECT_NAME)
 
-    def file_name(self) -> str:
+    def file_name(self) -> str | None:
         return self.get_property(definitions.WPD_OBJECT_ORIGINAL_FILE_NAME)
 
+    def persistent_unique_id(self) -> str | None:
+        """Unlike the object ID, this is stable across sessions"""
+        return self.get_property(definitions.WPD_OBJECT_PERSISTENT_UNIQUE_ID)
+
     # Object property attributes ###############################################
 
     def property_attributes(self, property: PropertyKey) -> dict:  # TODO more specific
@@ -97,17 +101,72 @@ class Object:
             result[key] = value.value
         return result
 
+    # Resources ################################################################
+
+    def supported_resources(self) -> list[PropertyKey]:
+        """The resources (e. g. WPD_RESOURCE_DEFAULT, WPD_RESOURCE_THUMBNAIL)
+        that can be downloaded from this object"""
+        supported_resources = self._content.transfer().get_supported_resources(self._object_id)
+        return [supported_resources.get_at(i) for i in range(supported_resources.get_count())]
+
+    def supports_resource(self, resource: PropertyKey) -> bool:
+        return resource in self.supported_resources()
+
+    def read_resource(self, resource: PropertyKey, chunk_size: int | None = None, *,
+                      progress: ProgressCallback | None = None) -> bytes | None:
+        """Returns None if the object does not have the resource"""
+        try:
+            return self.download_all(chunk_size, resource = resource, progress = progress)
+        except COMError as e:
+            if _is_missing_resource(e):
+                return None
+            raise
+
+    def thumbnail(self, chunk_size: int | None = None, *,
+                  progress: ProgressCallback | None = None) -> bytes | None:
+        """Returns None if the object does not have a thumbnail"""
+        return self.read_resource(definitions.WPD_RESOURCE_THUMBNAIL, chunk_size, progress = progress)
+
     # Object access ############################################################
 
     # You must exhaust or close the iterator, or you won't be able to delete
     # the file
-    def download(self, chunk_size: int | None = None) -> Generator[bytes]:
-        stream, optimal_transfer_size = self._content.transfer().get_stream(self._object_id)
-
-        if chunk_size is None:
-            chunk_size = optimal_transfer_size
+    def download(self, chunk_size: int | AdaptiveChunkSize | None = None, *,
+                 resource: PropertyKey = definitions.WPD_RESOURCE_DEFAULT,
+                 progress: ProgressCallback | None = None, offset: int = 0,
+                 size: int | None = None) -> Generator[bytes]:
+        """Downloads the given resource of the object. By default, this is the
+        object's data (i. e., the file content); use `resource` to download a
+        different resource, e. g., WPD_RESOURCE_THUMBNAIL.
+
+        `chunk_size` can be None (use the optimal transfer size reported by the
+        driver), a fixed size, or an AdaptiveChunkSize.
+
+        If `progress` is given, it is called with a TransferProgress
+        periodically and when the download is finished (or closed early). For
+        the object's data, the total size is queried from the device unless
+        it is passed as `size`.
+
+        If `offset` is given, the download starts at that position. If the
+        device doesn't support seeking, the data before `offset` is still
+        transferred, but not returned."""
+        stream, optimal_transfer_size = self._content.transfer().get_stream(self._object_id, resource)
+        sizer = chunk_sizer(chunk_size, self._device.device_id, optimal_transfer_size)
+        reporter = self._download_progress_reporter(progress, resource, offset, size)
+
+        if offset:
+            _seek(stream, offset, optimal_transfer_size)
+
+        while True:
+            start = perf_counter()
+            chunk = stream.remote_read(sizer.chunk_size)
+            end = perf_counter()
+            if not chunk:
+                break
+            # The empty read at the end is not a throughput sample
+            sizer.record(len(chunk), end - start)
+            reporter.update(len(chunk), end)
 
-        while chunk := stream.remote_read(chunk_size):
             try:
                 yield chunk
             except GeneratorExit:
@@ -118,11 +177,29 @@ class Object:
                 # next operation
                 del stream
 
-                break
+                sizer.finish()
+                reporter.cancel()
+                return
+
+        sizer.finish()
+        reporter.finish()
+
+    def _download_progress_reporter(self, progress: ProgressCallback | None, resource: PropertyKey, offset: int,
+                                    size: int | None) -> ProgressReporter:
+        if progress is None:
+            return progress_reporter(None)
+
+        # The size is only known for the object's data
+        if size is None and resource == definitions.WPD_RESOURCE_DEFAULT:
+            size = self.get_property(definitions.WPD_OBJECT_SIZE)
 
-    def download_all(self, chunk_size: int | None = None) -> bytes:
+        return progress_reporter(progress, object_id = self._object_id, total_bytes = size, initial_bytes = offset)
+
+    def download_all(self, chunk_size: int | AdaptiveChunkSize | None = None, *,
+                     resource: PropertyKey = definitions.WPD_RESOURCE_DEFAULT,
+                     progress: ProgressCallback | None = None) -> bytes:
         buffer = bytearray()
-        for chunk in self.download(chunk_size):
+        for chunk in self.download(chunk_size, resource = resource, progress = progress):
             buffer.extend(chunk)
         return buffer
 
@@ -152,15 +229,20 @@ class Object:
             for object_id in object_ids:
                 yield Object(self._device, object_id)
 
-    # TODO a custom generator would be nicer
-    def children(self) -> ObjectList:
-        return ObjectList(self._children())
+    def children(self) -> LazyObjectList:
+        """The children are only enumerated as far as they are accessed"""
+        return LazyObjectList(self._children())
 
-    def child_by_path(self, child_path: list[str]) -> Self:
+    def child_by_path(self, child_path: list[str], *, unique: bool = True) -> Self:
+        """Each path component is matched by file name. If `unique` is true,
+        AmbiguousObject is raised if a directory contains more than one object
+        with that name, which requires enumerating the whole directory.
+        Otherwise, the first matching object is used, and the enumeration of
+        each directory stops there."""
         current = self
 
         for child_name in child_path:
-            current = current.children().by_file_name(child_name)
+            current = current.children().by_file_name(child_name, unique = unique)
 
         return current
 
@@ -171,28 +253,75 @@ class Object:
             yield from child.walk(depth = depth + 1)
 
     def create_directory(self, dir_name: str) -> Self:
-        values = PortableDeviceValues.create()
+        values = self._device._values()
         values.set_guid_value(definitions.WPD_OBJECT_CONTENT_TYPE, definitions.WPD_CONTENT_TYPE_FOLDER)
         values.set_string_value(definitions.WPD_OBJECT_PARENT_ID, self._object_id)
         values.set_string_value(definitions.WPD_OBJECT_NAME, dir_name)
 
         return type(self)(self._device, self._content.create_object_with_properties_only(values))
 
-    # TODO rename
-    def upload_file(self, file_name: str, content: bytes) -> Self:
-        values = PortableDeviceValues.create()
+    def _create_file(self, file_name: str, size: int):
+        """Returns the stream to write the content to, and the optimal transfer
+        size. The object is created when the stream is committed."""
+        values = self._device._values()
         values.set_string_value(definitions.WPD_OBJECT_PARENT_ID, self._object_id)
-        values.set_unsigned_large_integer_value(definitions.WPD_OBJECT_SIZE, len(content))
+        values.set_unsigned_large_integer_value(definitions.WPD_OBJECT_SIZE, size)
         values.set_string_value(definitions.WPD_OBJECT_ORIGINAL_FILE_NAME, file_name)
         values.set_string_value(definitions.WPD_OBJECT_NAME, file_name)
 
-        stream, chunk_size = self._content.create_object_with_properties_and_data(values)
-        buffer = bytearray(content)
-        while buffer:
-            this_chunk_size = min(len(buffer), chunk_size)
-            chunk = buffer[0:this_chunk_size]
-            buffer[0:this_chunk_size] = []
+        return self._content.create_object_with_properties_and_data(values)
+
+    def _write_file(self, stream, chunks: Iterable[bytes], sizer: ChunkSizer, reporter: ProgressReporter) -> Self:
+        for chunk in chunks:
+            start = perf_counter()
             stream.remote_write(chunk)
+            end = perf_counter()
+            sizer.record(len(chunk), end - start)
+            reporter.update(len(chunk), end)
         stream.commit()
+        sizer.finish()
+
+        object_id = stream.get_object_id()
+        reporter.finish(object_id)
+
+        return type(self)(self._device, object_id)
+
+    # TODO rename
+    def upload_file(self, file_name: str, content: bytes, chunk_size: int | AdaptiveChunkSize | None = None, *,
+                    progress: ProgressCallback | None = None) -> Self:
+        stream, optimal_transfer_size = self._create_file(file_name, len(content))
+        sizer = chunk_sizer(chunk_size, self._device.device_id, optimal_transfer_size)
+        reporter = progress_reporter(progress, file_name = file_name, total_bytes = len(content))
+
+        def chunks():
+            # Slicing `content` only copies the chunk, rather than moving the
+            # rest of the buffer for every chunk
+            offset = 0
+            while offset < len(content):
+                chunk = content[offset:offset + sizer.chunk_size]
+                yield chunk
+                offset += len(chunk)
+
+        return self._write_file(stream, chunks(), sizer, reporter)
+
+    # Copy #####################################################################
+
+    def copy_into(self, target: Object, chunk_size: int | AdaptiveChunkSize | None = None, *,
+                  progress: ProgressCallback | None = None, buffers: int = 2) -> Self:
+        """Copies the object (recursively, for a folder) into the folder
+        `target` on the same device and returns the copy. `target` may be the
+        object itself, but not one of its descendants (ValueError).
+
+        The objects to copy are enumerated first. The content of all files is
+        then downloaded on a background thread and piped into the uploads: the
+        next chunk is read while the previous one is written, with at most
+        `buffers` chunks in memory. `progress` is called for the download of
+        each file, on the background thread.
+
+        COM objects must not be used from another thread, so the background
+        thread opens its own connection to the device, which is used for all
+        files. For a Device with an `api_device` (e. g. a recorded or replayed
+        session), the content is copied without a background thread instead."""
+        from portable_device._copy import copy
 
-        return type(self)(self._device, stream.get_object_id())
+        return copy([self], target, chunk_size, progress, buffers)[0]
@@ -1,18 +1,22 @@
-# TODO an ObjectGenerator might be better
+from __future__ import annotations
 
-from collections.abc import Iterator
-from typing import TYPE_CHECKING, Self
+from collections.abc import Iterator, Iterable, Sequence, Callable
+from typing import TYPE_CHECKING, Self, overload
 
-from comtypes.automation import VT_LPWSTR
-
-from portable_device_api import (definitions, PortableDeviceKeyCollection, PropertyKey, PortableDeviceValues,
-                                 PortableDevicePropVariantCollection, PropVariant, errors)
+from portable_device._api import definitions
+from portable_device.chunk_size import AdaptiveChunkSize
+from portable_device.exceptions import ObjectNotFound, AmbiguousObject
+from portable_device.progress import ProgressCallback
 
 if TYPE_CHECKING:  # pragma: no cover
+    from portable_device_api import PropertyKey
     from portable_device import Object
 
 
-class ObjectList(list["Object"]):
+class ObjectSequence(Sequence["Object"]):
+    """Operations on a sequence of objects, implemented by ObjectList and
+    LazyObjectList"""
+
     def object_names(self) -> Iterator[str]:
         for object_ in self:
             yield object_.object_name()
@@ -22,23 +26,57 @@ class ObjectList(list["Object"]):
         for object_ in self:
             yield object_.file_name()
 
-    def by_object_name(self, object_name: str) -> "Object":
-        matching_objects = [o for o in self if o.object_name() == object_name]
-        assert len(matching_objects) == 1
-        return matching_objects[0]
+    def find(self, filter_: Callable[["Object"], bool], /, reference: str, *, unique: bool = True) -> "Object":
+        """If `unique` is true, all objects are checked and AmbiguousObject is
+        raised if more than one matches. Otherwise, the first matching object
+        is returned and the remaining objects are not checked (and, for a
+        LazyObjectList, not enumerated)."""
+        matching_objects = []
+        for object_ in self:
+            if filter_(object_):
+                if not unique:
+                    return object_
+                matching_objects.append(object_)
+
+        if len(matching_objects) == 0:
+            raise ObjectNotFound(reference)
+        elif len(matching_objects) == 1:
+            return matching_objects[0]
+        else:
+            raise AmbiguousObject(reference)
+
+    def by_object_name(self, object_name: str, *, unique: bool = True) -> "Object":
+        return self.find(lambda o: o.object_name() == object_name, repr(object_name), unique = unique)
+
+    def by_file_name(self, file_name: str, *, unique: bool = True) -> "Object":
+        return self.find(lambda o: o.file_name() == file_name, repr(file_name), unique = unique)
+
+    def download_resource(self, resource: PropertyKey, chunk_size: int | None = None, *,
+                          progress: ProgressCallback | None = None) -> Iterator[tuple["Object", bytes | None]]:
+        """Downloads the given resource (e. g. WPD_RESOURCE_THUMBNAIL) of each
+        object, without transferring the objects' data. Yields None for objects
+        that don't have the resource. `progress` is called for each object."""
+        for object_ in self:
+            yield object_, object_.read_resource(resource, chunk_size, progress = progress)
 
-    def by_file_name(self, file_name: str) -> "Object":
-        matching_objects = [o for o in self if o.file_name() == file_name]
-        assert len(matching_objects) == 1
-        return matching_objects[0]
+    def thumbnails(self, chunk_size: int | None = None, *,
+                   progress: ProgressCallback | None = None) -> Iterator[tuple["Object", bytes | None]]:
+        return self.download_resource(definitions.WPD_RESOURCE_THUMBNAIL, chunk_size, progress = progress)
+
+    def copy_into(self, target: "Object", chunk_size: int | AdaptiveChunkSize | None = None, *,
+                  progress: ProgressCallback | None = None, buffers: int = 2) -> "ObjectList":
+        """Copies the objects into the folder `target`, see Object.copy_into"""
+        from portable_device._copy import copy
+
+        return copy(self, target, chunk_size, progress, buffers)
 
     # TODO is this faster than deleting individually?
     # TODO expected result is [0] * len(object_ids)
     def delete(self, recursive: bool) -> list[int]:
         # TODO code duplication with Object._delete, factor out
-        object_ids_pvc = PortableDevicePropVariantCollection.create()
-        for object_ in self:
-            object_ids_pvc.add(PropVariant.create(VT_LPWSTR, object_.object_id))
+        from portable_device_api import errors
+
+        object_ids_pvc = self[0].device._string_collection(object_.object_id for object_ in self)
 
         if recursive:
             flags = definitions.DELETE_OBJECT_OPTIONS.PORTABLE_DEVICE_DELETE_WITH_RECURSION
@@ -53,11 +91,85 @@ class ObjectList(list["Object"]):
 
     def move_into(self, target: "Object"):
         # TODO multi-move
-        object_ids_pvc = PortableDevicePropVariantCollection.create()
-        for object_ in self:
-            object_ids_pvc.add(PropVariant.create(VT_LPWSTR, object_.object_id))
+        from portable_device_api import errors
+
+        object_ids_pvc = self[0].device._string_collection(object_.object_id for object_ in self)
 
         # TODO assert that all contents are the same (or group)
         move_result = self[0]._content.move(object_ids_pvc, target.object_id)
         assert move_result.get_count() == len(self)
         return [errors.to_hresult(move_result.get_at(i).value) for i in range(move_result.get_count())]
+
+
+class ObjectList(list["Object"], ObjectSequence):
+    pass
+
+
+class LazyObjectList(ObjectSequence):
+    """An ObjectSequence that takes its objects from an iterator, but only as
+    far as needed. For example, indexing only enumerates up to the index, and
+    `by_file_name(..., unique=False)` stops at the first match.
+
+    Objects that have been enumerated are cached, so iterating again does not
+    access the device."""
+
+    def __init__(self, objects: Iterable["Object"]):
+        self._objects: list["Object"] = []
+        self._iterator: Iterator["Object"] | None = iter(objects)
+
+    def _fill(self, count: int | None) -> int:
+        """Enumerates objects until there are at least `count` objects (all if
+        `count` is None) or the iterator is exhausted. Returns the number of
+        available objects."""
+        while self._iterator is not None and (count is None or len(self._objects) < count):
+            try:
+                self._objects.append(next(self._iterator))
+            except StopIteration:
+                self._iterator = None
+
+        return len(self._objects)
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether all objects have been enumerated"""
+        return self._iterator is None
+
+    def materialize(self) -> ObjectList:
+        self._fill(None)
+        return ObjectList(self._objects)
+
+    def __len__(self) -> int:
+        return self._fill(None)
+
+    def __bool__(self) -> bool:
+        return self._fill(1) > 0
+
+    @overload
+    def __getitem__(self, index: int) -> "Object": ...
+
+    @overload
+    def __getitem__(self, index: slice) -> ObjectList: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.stop is not None and index.stop >= 0 and (index.start or 0) >= 0 and (index.step or 1) > 0:
+                self._fill(index.stop)
+            else:
+                self._fill(None)
+            return ObjectList(self._objects[index])
+
+        if index >= 0:
+            self._fill(index + 1)
+        else:
+            self._fill(None)
+        return self._objects[index]
+
+    def __iter__(self) -> Iterator["Object"]:
+        index = 0
+        while index < self._fill(index + 1):
+            yield self._objects[index]
+            index += 1
+
+    def __repr__(self) -> str:
+        state = "complete" if self.is_complete else "incomplete"
+        return f"{type(self).__name__}({self._objects!r}, {state})"
@@ -0,0 +1,74 @@
+from collections.abc import Iterable
+import json
+import os
+from pathlib import Path
+from typing import Self
+
+
+class PersistentIdIndex:
+    """Maps persistent unique IDs (WPD_OBJECT_PERSISTENT_UNIQUE_ID), which are
+    stable across sessions, to object IDs, which may not be.
+
+    Entries are either verified (they were obtained from the device in this
+    session) or not (they were loaded from a file, so the object ID may be
+    outdated). Unverified entries must be checked before they are used, which
+    is still much cheaper than resolving a path."""
+
+    def __init__(self):
+        self._object_ids: dict[str, str] = {}
+        self._verified: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._object_ids)
+
+    def __contains__(self, persistent_id: str) -> bool:
+        return persistent_id in self._object_ids
+
+    def add(self, persistent_id: str, object_id: str, *, verified: bool = True):
+        self._object_ids[persistent_id] = object_id
+        if verified:
+            self._verified.add(persistent_id)
+        else:
+            self._verified.discard(persistent_id)
+
+    def update(self, entries: Iterable[tuple[str, str]], *, verified: bool = True):
+        for persistent_id, object_id in entries:
+            self.add(persistent_id, object_id, verified = verified)
+
+    def discard(self, persistent_id: str):
+        self._object_ids.pop(persistent_id, None)
+        self._verified.discard(persistent_id)
+
+    def get(self, persistent_id: str) -> str | None:
+        return self._object_ids.get(persistent_id)
+
+    def is_verified(self, persistent_id: str) -> bool:
+        return persistent_id in self._verified
+
+    def verify(self, persistent_id: str):
+        if persistent_id in self._object_ids:
+            self._verified.add(persistent_id)
+
+    # Persistence ##############################################################
+
+    def save(self, path: str | os.PathLike):
+        # Write to a temporary file first, so an interruption doesn't destroy
+        # the existing index
+        path = Path(path)
+        temporary_path = path.with_name(path.name + ".tmp")
+        with open(temporary_path, "w", encoding = "utf-8") as file:
+            json.dump(self._object_ids, file)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> Self:
+        """Loads an index saved by `save`. All entries are unverified. If the
+        file doesn't exist, the index is empty."""
+        index = cls()
+
+        path = Path(path)
+        if path.exists():
+            with open(path, "r", encoding = "utf-8") as file:
+                index.update(json.load(file).items(), verified = False)
+
+        return index
@@ -0,0 +1,62 @@
+from collections.abc import Iterator
+import queue
+import threading
+
+_end = object()
+
+
+class _Failure:
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+def pipe(chunks: Iterator[bytes], *, buffers: int = 2) -> Iterator[bytes]:
+    """Iterates `chunks` on a background thread, so producing the next chunk
+    (e. g. reading from the device) overlaps with consuming the previous one
+    (e. g. writing to the device).
+
+    At most `buffers` chunks are waiting to be consumed, so the memory is
+    bounded regardless of the total size. Exceptions raised by `chunks` are
+    re-raised in the consumer. If the consumer stops early, the producer is
+    stopped and `chunks` is closed (if it is a generator).
+
+    Note that a generator's body runs on the background thread, so it must
+    not use COM objects created on another thread."""
+    buffer: queue.Queue = queue.Queue(maxsize = buffers)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Wait for space, but give up if the consumer has stopped
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout = 0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    break
+            else:
+                put(_end)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target = produce, name = "portable_device pipe", daemon = True)
+    thread.start()
+
+    try:
+        while (item := buffer.get()) is not _end:
+            if isinstance(item, _Failure):
+                raise item.exception
+            yield item
+    finally:
+        stop.set()
+        thread.join()
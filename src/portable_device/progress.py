@@ -0,0 +1,124 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from time import perf_counter
+
+
+@dataclass(frozen = True)
+class TransferProgress:
+    """A progress report for the transfer of a single file.
+
+    `object_id` is None for uploads until the object has been created (i. e.,
+    until the final report). `file_name` is only known for uploads.
+    `total_bytes` is None if the size is not known in advance. `bytes_done`
+    includes the data before the start of a resumed transfer; the rates don't.
+
+    The final report has `finished` set if the transfer completed, or
+    `cancelled` if it was stopped early (e. g. the download was closed)."""
+    object_id: str | None
+    file_name: str | None
+    bytes_done: int
+    total_bytes: int | None
+    elapsed: float
+    instantaneous_rate: float
+    average_rate: float
+    finished: bool
+    cancelled: bool = False
+
+    @property
+    def fraction(self) -> float | None:
+        if not self.total_bytes:
+            return None
+        return self.bytes_done / self.total_bytes
+
+
+ProgressCallback = Callable[[TransferProgress], None]
+
+
+class ProgressReporter:
+    """Reports the progress of a single transfer. The transfer calls `update`
+    after each chunk and `finish` after the last one, or `cancel` if it is
+    stopped early. This one does nothing."""
+
+    def update(self, num_bytes: int, now: float):
+        pass
+
+    def finish(self, object_id: str | None = None):
+        pass
+
+    def cancel(self):
+        pass
+
+
+class _CallbackProgressReporter(ProgressReporter):
+    def __init__(self, callback: ProgressCallback, *, object_id: str | None, file_name: str | None,
+                 total_bytes: int | None, initial_bytes: int, interval: float):
+        self._callback = callback
+        self._object_id = object_id
+        self._file_name = file_name
+        self._total_bytes = total_bytes
+        self._interval = interval
+
+        self._start = perf_counter()
+        self._initial_bytes = initial_bytes
+        self._bytes_done = initial_bytes
+        self._last_report_time = self._start
+        self._last_report_bytes = initial_bytes
+        self._next_report_time = self._start + interval
+
+    def update(self, num_bytes: int, now: float):
+        # This is called for every chunk, so keep it cheap: only report when
+        # the interval has elapsed
+        self._bytes_done += num_bytes
+        if now >= self._next_report_time:
+            self._report(now)
+
+    def finish(self, object_id: str | None = None):
+        if object_id is not None:
+            self._object_id = object_id
+        self._report(perf_counter(), finished = True)
+
+    def cancel(self):
+        self._report(perf_counter(), cancelled = True)
+
+    def _report(self, now: float, *, finished: bool = False, cancelled: bool = False):
+        elapsed = now - self._start
+        since_last_report = now - self._last_report_time
+
+        if since_last_report > 0:
+            instantaneous_rate = (self._bytes_done - self._last_report_bytes) / since_last_report
+        else:
+            instantaneous_rate = 0.0
+
+        average_rate = (self._bytes_done - self._initial_bytes) / elapsed if elapsed > 0 else 0.0
+
+        self._last_report_time = now
+        self._last_report_bytes = self._bytes_done
+        self._next_report_time = now + self._interval
+
+        self._callback(TransferProgress(
+            object_id = self._object_id,
+            file_name = self._file_name,
+            bytes_done = self._bytes_done,
+            total_bytes = self._total_bytes,
+            elapsed = elapsed,
+            instantaneous_rate = instantaneous_rate,
+            average_rate = average_rate,
+            finished = finished,
+            cancelled = cancelled,
+        ))
+
+
+def progress_reporter(callback: ProgressCallback | None, *,
+                      object_id: str | None = None, file_name: str | None = None,
+                      total_bytes: int | None = None, initial_bytes: int = 0,
+                      interval: float = 0.1) -> ProgressReporter:
+    """Creates the progress reporter for a single transfer. The callback is
+    called at most once per `interval` seconds while the transfer is running,
+    and once when it is finished or cancelled. `initial_bytes` is the amount
+    of data that was transferred before (for a resumed transfer)."""
+    if callback is None:
+        return ProgressReporter()
+    else:
+        return _CallbackProgressReporter(callback, object_id = object_id, file_name = file_name,
+                                         total_bytes = total_bytes, initial_bytes = initial_bytes,
+                                         interval = interval)
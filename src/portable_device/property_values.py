@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, Self
+
+from portable_device._api import VT_ERROR
+from portable_device.com import thread_cache
+
+if TYPE_CHECKING:  # pragma: no cover
+    from portable_device_api import PortableDeviceKeyCollection, PortableDeviceValues, PropertyKey
+
+
+_key_collections_size = 64
+
+
+def key_collection(keys: tuple[PropertyKey, ...]) -> PortableDeviceKeyCollection:
+    """Returns a PortableDeviceKeyCollection with the given keys. Collections
+    are cached, so querying the same keys repeatedly (e. g. for every object
+    during a walk) doesn't create a new collection every time. The result
+    must not be modified.
+
+    The cache is per thread, see portable_device.com.thread_cache."""
+    try:
+        key_collections: dict = thread_cache.key_collections
+    except AttributeError:
+        key_collections = thread_cache.key_collections = {}
+
+    collection = key_collections.get(keys)
+    if collection is None:
+        from portable_device_api import PortableDeviceKeyCollection
+
+        collection = PortableDeviceKeyCollection.create()
+        for key in keys:
+            collection.add(key)
+
+        if len(key_collections) >= _key_collections_size:
+            # Evict the oldest entry
+            del key_collections[next(iter(key_collections))]
+        key_collections[keys] = collection
+
+    return collection
+
+
+class PropertyValues(Mapping["PropertyKey", Any]):
+    """The values of the properties that were requested for an object.
+
+    Only properties that the object has are contained in the mapping, in the
+    order they were requested. Properties that were requested, but that the
+    object doesn't have (e. g. the original file name of a storage object), are
+    listed in `missing`."""
+
+    def __init__(self, keys: Sequence[PropertyKey], values: dict[PropertyKey, Any]):
+        self._keys = [key for key in keys if key in values]
+        self._values = values
+        self.missing: tuple[PropertyKey, ...] = tuple(key for key in keys if key not in values)
+
+    @classmethod
+    def decode(cls, keys: Sequence[PropertyKey], values: PortableDeviceValues) -> Self:
+        """Decodes the result of PortableDeviceProperties.get_values in a
+        single pass. For missing properties, the device returns a VT_ERROR
+        value (the error code, e. g. ERROR_NOT_FOUND), which could not be told
+        apart from an integer-valued property after accessing `.value`."""
+        decoded = {}
+        for i in range(values.get_count()):
+            key, value = values.get_at(i)
+            if value.vt != VT_ERROR:
+                decoded[key] = value.value
+
+        return cls(keys, decoded)
+
+    def __getitem__(self, key: PropertyKey) -> Any:
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[PropertyKey]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{key!r}: {self._values[key]!r}" for key in self._keys)
+        return f"{type(self).__name__}({{{values}}}, missing={list(self.missing)!r})"
@@ -0,0 +1,167 @@
+"""Recording of the portable_device_api calls made by a Device and the objects
+obtained from it, for replaying them later (see portable_device.replay).
+
+Only the calls that go to the device are recorded (everything reached through
+the PortableDevice: content, properties, resources, streams, enumerators).
+Collections and property values in arguments and results are recorded as
+values; the data of stream reads and writes is not recorded, only its size.
+
+The recording is a gzip-compressed file with one JSON document per line: a
+header with information about the device, followed by one line per call."""
+
+from collections.abc import Callable
+from datetime import datetime
+import gzip
+import json
+import os
+from time import perf_counter
+from typing import Any
+
+from portable_device._api import RecordedDefinition
+
+format_version = 1
+
+
+def _definitions():
+    """portable_device_api.definitions, or None if it is not available (e. g.
+    when replaying on a different platform)"""
+    try:
+        from portable_device_api import definitions
+    except ImportError:
+        return None
+    return definitions
+
+
+def _is_collection(value) -> bool:
+    return hasattr(value, "get_count") and hasattr(value, "get_at")
+
+
+def _is_variant(value) -> bool:
+    return hasattr(value, "vt") and hasattr(value, "value")
+
+
+def encode(value) -> Any:
+    """Encodes an argument or result as JSON-compatible data"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        return {"size": len(value)}
+    elif isinstance(value, tuple):
+        return {"tuple": [encode(item) for item in value]}
+    elif isinstance(value, list):
+        return {"list": [encode(item) for item in value]}
+    elif isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    elif _is_variant(value):
+        return {"variant": [int(value.vt), encode(value.value)]}
+    elif _is_collection(value):
+        return {"collection": [encode(value.get_at(i)) for i in range(value.get_count())]}
+    elif isinstance(value, RecordedDefinition):
+        # Replayed without portable_device_api
+        return {"definition": value.name}
+    elif callable(value):
+        return {"callable": getattr(value, "__name__", "")}
+
+    definitions = _definitions()
+    try:
+        name = definitions.reverse_lookup.get(value) if definitions else None
+    except TypeError:  # Not hashable
+        name = None
+    if name is not None:
+        return {"definition": name}
+
+    return {"repr": repr(value)}
+
+
+def _is_handle(value) -> bool:
+    """Whether a result is an interface that talks to the device (as opposed
+    to a value), and must be recorded as a handle"""
+    if value is None or isinstance(value, (bool, int, float, str, bytes, bytearray, list, datetime)):
+        return False
+    return not (_is_variant(value) or _is_collection(value))
+
+
+class Recorder:
+    """Records the calls made through the proxies it creates. Use `device` to
+    create a Device that records its calls, then `save` the recording."""
+
+    def __init__(self):
+        self._calls: list[dict] = []
+        self._handle_count = 0
+        self._header: dict = {}
+
+    @property
+    def call_count(self) -> int:
+        return len(self._calls)
+
+    def _new_handle(self) -> int:
+        handle = self._handle_count
+        self._handle_count += 1
+        return handle
+
+    def proxy(self, target) -> "_RecordingProxy":
+        return _RecordingProxy(self, self._new_handle(), target)
+
+    def device(self, device):
+        """Returns a new Device for the same device as `device` whose calls are
+        recorded. Open it to start the session."""
+        from portable_device_api import PortableDevice
+        from portable_device import Device
+
+        self._header = {
+            "version": format_version,
+            "device_id": device.device_id,
+            "description": device.description,
+            "friendly_name": device.friendly_name,
+            "manufacturer": device.manufacturer,
+        }
+
+        return Device(device.device_id, api_device = self.proxy(PortableDevice.create()))
+
+    def _record(self, handle: int, method: str, args: tuple, result, seconds: float):
+        self._calls.append({"h": handle, "m": method, "a": encode(args)["tuple"], "r": result, "t": seconds})
+
+    def save(self, path: str | os.PathLike):
+        with gzip.open(path, "wt", encoding = "utf-8") as file:
+            file.write(json.dumps(self._header) + "\n")
+            for call in self._calls:
+                file.write(json.dumps(call, separators = (",", ":")) + "\n")
+
+
+class _RecordingProxy:
+    def __init__(self, recorder: Recorder, handle: int, target):
+        self._recorder = recorder
+        self._handle = handle
+        self._target = target
+
+    def __getattr__(self, name: str) -> Callable:
+        method = getattr(self._target, name)
+
+        def call(*args):
+            start = perf_counter()
+            try:
+                result = method(*args)
+            except Exception as e:
+                seconds = perf_counter() - start
+                self._recorder._record(self._handle, name, args, {"error": [getattr(e, "hresult", None), str(e)]},
+                                       seconds)
+                raise
+            seconds = perf_counter() - start
+
+            result, encoded = self._wrap(result)
+            self._recorder._record(self._handle, name, args, encoded, seconds)
+            return result
+
+        return call
+
+    def _wrap(self, result) -> tuple[Any, Any]:
+        """Returns the result to return to the caller (with proxies for handles)
+        and its encoding"""
+        if isinstance(result, tuple):
+            wrapped = [self._wrap(item) for item in result]
+            return tuple(item for item, _ in wrapped), {"tuple": [encoded for _, encoded in wrapped]}
+        elif _is_handle(result):
+            proxy = self._recorder.proxy(result)
+            return proxy, {"handle": proxy._handle}
+        else:
+            return result, encode(result)
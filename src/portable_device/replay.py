@@ -0,0 +1,205 @@
+"""Replaying of sessions recorded with portable_device.recording.
+
+A ReplaySession serves the recorded results in the order they were recorded
+(for each interface and method), optionally waiting for the recorded (or
+scaled) latency of each call. The code under test must make the same calls
+with the same arguments as the recorded code; otherwise, ReplayMismatch is
+raised.
+
+This module, and the Device returned by ReplaySession.device, don't depend on
+comtypes or portable_device_api, so the recording can be replayed on any
+platform. Recorded WPD definitions (e. g. property keys) are decoded to the
+values from portable_device_api if it is available, and to RecordedDefinition
+otherwise (see portable_device._api). Recorded errors are raised as
+ReplayedError, which is a COMError if comtypes is available."""
+
+from collections import defaultdict, deque
+from collections.abc import Iterable
+from datetime import datetime
+from functools import cache
+import gzip
+import json
+import os
+import time
+from typing import Any, Self
+
+from portable_device._api import VT_CLSID, VT_LPWSTR, VT_UI8, RecordedDefinition, ReplayedError, definitions
+from portable_device.recording import encode
+
+
+class ReplayMismatch(RuntimeError):
+    def __init__(self, reference):
+        self.reference = reference
+
+    def __str__(self) -> str:
+        return f"Replay mismatch: {self.reference}"
+
+
+class _ReplayVariant:
+    def __init__(self, vt: int, value):
+        self.vt = vt
+        self.value = value
+
+
+class _ReplayCollection:
+    """Stands in for PortableDeviceValues, PortableDeviceKeyCollection and
+    PortableDevicePropVariantCollection"""
+
+    def __init__(self, items: list):
+        self._items = items
+
+    def get_count(self) -> int:
+        return len(self._items)
+
+    def get_at(self, index: int):
+        return self._items[index]
+
+    def get_value(self, key):
+        for item_key, value in self._items:
+            if item_key == key:
+                return value
+        raise KeyError(key)
+
+
+class _ReplayValues(_ReplayCollection):
+    """Stands in for a PortableDeviceValues that is passed to the device"""
+
+    def __init__(self):
+        super().__init__([])
+
+    def set_string_value(self, key, value: str):
+        self._items.append((key, _ReplayVariant(VT_LPWSTR, value)))
+
+    def set_guid_value(self, key, value):
+        self._items.append((key, _ReplayVariant(VT_CLSID, value)))
+
+    def set_unsigned_large_integer_value(self, key, value: int):
+        self._items.append((key, _ReplayVariant(VT_UI8, value)))
+
+
+class ReplaySession:
+    def __init__(self, header: dict, calls: list[dict], *, latency_scale: float = 1.0):
+        """`latency_scale` is applied to the recorded latency of each call; use
+        0 to replay as fast as possible."""
+        self.header = header
+        self.latency_scale = latency_scale
+
+        self._calls: dict[tuple[int, str], deque[dict]] = defaultdict(deque)
+        for call in calls:
+            self._calls[(call["h"], call["m"])].append(call)
+
+        self.call_count = len(calls)
+        self.recorded_latency = sum(call["t"] for call in calls)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike, *, latency_scale: float = 1.0) -> Self:
+        with gzip.open(path, "rt", encoding = "utf-8") as file:
+            header = json.loads(file.readline())
+            calls = [json.loads(line) for line in file if line.strip()]
+
+        return cls(header, calls, latency_scale = latency_scale)
+
+    @property
+    def remaining_calls(self) -> int:
+        return sum(len(calls) for calls in self._calls.values())
+
+    def root(self) -> "_ReplayHandle":
+        """The replayed PortableDevice"""
+        return _ReplayHandle(self, 0)
+
+    def device(self):
+        """Returns a Device that replays the session"""
+        return _replay_device_class()(self)
+
+    def _call(self, handle: int, method: str, args: tuple):
+        try:
+            call = self._calls[(handle, method)].popleft()
+        except IndexError:
+            raise ReplayMismatch(f"unexpected call of {method} on handle {handle}") from None
+
+        encoded_args = encode(args)["tuple"]
+        if encoded_args != call["a"]:
+            raise ReplayMismatch(f"arguments of {method} on handle {handle}: {encoded_args} instead of {call['a']}")
+
+        if self.latency_scale:
+            time.sleep(call["t"] * self.latency_scale)
+
+        result = call["r"]
+        if isinstance(result, dict) and "error" in result:
+            raise ReplayedError(*result["error"])
+
+        return self._decode(result)
+
+    def _decode(self, value) -> Any:
+        if not isinstance(value, dict):
+            return value
+        elif "handle" in value:
+            return _ReplayHandle(self, value["handle"])
+        elif "size" in value:
+            return bytes(value["size"])
+        elif "tuple" in value:
+            return tuple(self._decode(item) for item in value["tuple"])
+        elif "list" in value:
+            return [self._decode(item) for item in value["list"]]
+        elif "datetime" in value:
+            return datetime.fromisoformat(value["datetime"])
+        elif "variant" in value:
+            vt, inner = value["variant"]
+            return _ReplayVariant(vt, self._decode(inner))
+        elif "collection" in value:
+            return _ReplayCollection([self._decode(item) for item in value["collection"]])
+        elif "definition" in value:
+            name = value["definition"]
+            return getattr(definitions, name) if hasattr(definitions, name) else RecordedDefinition(name)
+        else:
+            return RecordedDefinition(value.get("repr", ""))
+
+
+class _ReplayHandle:
+    def __init__(self, session: ReplaySession, handle: int):
+        self._session = session
+        self._handle = handle
+
+    def __getattr__(self, name: str):
+        def call(*args):
+            return self._session._call(self._handle, name, args)
+        return call
+
+
+@cache
+def _replay_device_class():
+    from portable_device import Device
+
+    class ReplayDevice(Device):
+        """A Device that replays a recorded session. The properties that
+        don't require opening the device are taken from the recording."""
+
+        def __init__(self, session: ReplaySession):
+            super().__init__(session.header["device_id"], api_device = session.root())
+            self.session = session
+
+        @property
+        def description(self) -> str:
+            return self.session.header["description"]
+
+        @property
+        def friendly_name(self) -> str:
+            return self.session.header["friendly_name"]
+
+        @property
+        def manufacturer(self) -> str:
+            return self.session.header["manufacturer"]
+
+        # The values passed to the device only need to encode like the
+        # recorded ones
+
+        def _key_collection(self, keys: tuple) -> _ReplayCollection:
+            return _ReplayCollection(list(keys))
+
+        def _values(self) -> _ReplayValues:
+            return _ReplayValues()
+
+        def _string_collection(self, strings: Iterable[str]) -> _ReplayCollection:
+            return _ReplayCollection([_ReplayVariant(VT_LPWSTR, string) for string in strings])
+
+    return ReplayDevice
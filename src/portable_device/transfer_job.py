@@ -0,0 +1,267 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+
+from portable_device import Device
+from portable_device._api import definitions
+from portable_device.exceptions import ObjectNotFound
+from portable_device.chunk_size import AdaptiveChunkSize
+from portable_device.progress import ProgressCallback
+
+
+class TransferJournal:
+    """A local record of the progress of a transfer job, so the job can be
+    resumed after an interruption (e. g. the device was disconnected).
+
+    The journal is a file with one JSON record per line. Records are only ever
+    appended and flushed to disk immediately; a record that was only partially
+    written (e. g. the process was killed) is ignored when reading."""
+
+    def __init__(self, path: str | os.PathLike):
+        self._path = Path(path)
+        self._done: set[str] = set()
+        self._offsets: dict[str, int] = {}
+        self._identities: dict[str, dict] = {}
+        self._started: set[str] = set()
+
+        if self._path.exists():
+            self._load()
+
+    def _load(self):
+        with open(self._path, "r", encoding = "utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if record["op"] == "done":
+                    self._done.add(record["key"])
+                    self._offsets.pop(record["key"], None)
+                    self._identities.pop(record["key"], None)
+                    self._started.discard(record["key"])
+                elif record["op"] == "started":
+                    self._started.add(record["key"])
+                elif record["op"] == "offset":
+                    self._offsets[record["key"]] = record["offset"]
+                elif record["op"] == "identity":
+                    self._identities[record["key"]] = record["identity"]
+
+    def _append(self, record: dict):
+        with open(self._path, "a", encoding = "utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def is_done(self, key: str) -> bool:
+        return key in self._done
+
+    def offset(self, key: str) -> int:
+        """The number of bytes that have been verified to be transferred"""
+        return self._offsets.get(key, 0)
+
+    def is_started(self, key: str) -> bool:
+        """Whether the transfer has been started, but not completed"""
+        return key in self._started
+
+    def record_started(self, key: str):
+        self._started.add(key)
+        self._append({"op": "started", "key": key})
+
+    def identity(self, key: str) -> dict | None:
+        """The identity of the source of a transfer (see `record_identity`)"""
+        return self._identities.get(key)
+
+    def record_identity(self, key: str, identity: dict):
+        """Records what identifies the source of a transfer (e. g. its size and
+        modification date), so that a resumed transfer can detect that the
+        source has been replaced"""
+        self._identities[key] = identity
+        self._append({"op": "identity", "key": key, "identity": identity})
+
+    def record_offset(self, key: str, offset: int):
+        self._offsets[key] = offset
+        self._append({"op": "offset", "key": key, "offset": offset})
+
+    def record_done(self, key: str):
+        self._done.add(key)
+        self._offsets.pop(key, None)
+        self._identities.pop(key, None)
+        self._started.discard(key)
+        self._append({"op": "done", "key": key})
+
+
+@dataclass(frozen = True)
+class Download:
+    """Download of the object at `source` (a device path, see
+    Device.object_by_path) to the local file `target`"""
+    source: tuple[str, ...]
+    target: Path
+
+    @property
+    def key(self) -> str:
+        return json.dumps(["download", list(self.source), str(self.target)])
+
+
+@dataclass(frozen = True)
+class Upload:
+    """Upload of the local file `source` to a file called `file_name` in the
+    directory at `target` (a device path, see Device.object_by_path)"""
+    source: Path
+    target: tuple[str, ...]
+    file_name: str
+
+    @property
+    def key(self) -> str:
+        return json.dumps(["upload", str(self.source), list(self.target), self.file_name])
+
+
+class TransferJob:
+    """A set of downloads and uploads that can be resumed after an
+    interruption.
+
+    Completed transfers are recorded in the journal and never transferred
+    again. For a download, the local file is flushed and its length recorded
+    every `checkpoint_bytes`; when resuming, the file is truncated to the last
+    recorded length and the download continues from there (seeking on the
+    device if supported). With the first checkpoint, the size, modification
+    date and persistent unique ID of the object are recorded; if any of them
+    has changed when resuming, the object has been replaced and the download
+    starts over.
+
+    Objects are identified by path rather than by object ID, since object IDs
+    may change between sessions. To resume, create a job with the same
+    transfers and journal on the reconnected device and run it again.
+
+    Uploads can't be resumed partially: the object is only created on the
+    device when the upload is complete, so an interrupted upload is restarted.
+    If an upload was started before, it is considered complete if the
+    directory already contains a file with the same name and size.
+    """
+
+    def __init__(self, device: Device, journal: str | os.PathLike | TransferJournal, *,
+                 checkpoint_bytes: int = 4 * 1024 * 1024,
+                 chunk_size: int | AdaptiveChunkSize | None = None,
+                 progress: ProgressCallback | None = None):
+        self._device = device
+        self._journal = journal if isinstance(journal, TransferJournal) else TransferJournal(journal)
+        self._checkpoint_bytes = checkpoint_bytes
+        self._chunk_size = chunk_size
+        self._progress = progress
+
+        self._transfers: list[Download | Upload] = []
+
+    @property
+    def journal(self) -> TransferJournal:
+        return self._journal
+
+    @property
+    def transfers(self) -> list[Download | Upload]:
+        return list(self._transfers)
+
+    def add_download(self, source: Iterable[str], target: str | os.PathLike) -> Download:
+        download = Download(tuple(source), Path(target))
+        self._transfers.append(download)
+        return download
+
+    def add_upload(self, source: str | os.PathLike, target: Iterable[str], file_name: str | None = None) -> Upload:
+        source = Path(source)
+        upload = Upload(source, tuple(target), file_name or source.name)
+        self._transfers.append(upload)
+        return upload
+
+    def pending(self) -> list[Download | Upload]:
+        return [transfer for transfer in self._transfers if not self._journal.is_done(transfer.key)]
+
+    def run(self) -> list[Download | Upload]:
+        """Runs the pending transfers and returns them. The device must be
+        open."""
+        pending = self.pending()
+
+        for transfer in pending:
+            if isinstance(transfer, Download):
+                self._download(transfer)
+            else:
+                self._upload(transfer)
+            self._journal.record_done(transfer.key)
+
+        return pending
+
+    @staticmethod
+    def _identity(object_) -> dict:
+        properties = object_.get_properties([
+            definitions.WPD_OBJECT_SIZE,
+            definitions.WPD_OBJECT_DATE_MODIFIED,
+            definitions.WPD_OBJECT_PERSISTENT_UNIQUE_ID,
+        ])
+        modified = properties.get(definitions.WPD_OBJECT_DATE_MODIFIED)
+
+        return {
+            "size": properties.get(definitions.WPD_OBJECT_SIZE),
+            "modified": modified.isoformat() if isinstance(modified, datetime) else None,
+            "persistent_id": properties.get(definitions.WPD_OBJECT_PERSISTENT_UNIQUE_ID),
+        }
+
+    def _download(self, download: Download):
+        object_ = self._device.object_by_path(download.source)
+        identity = self._identity(object_)
+
+        offset = self._journal.offset(download.key)
+        if self._journal.identity(download.key) != identity:
+            # The object at the path has been replaced (or the offset was
+            # recorded without an identity), so the local data doesn't belong
+            # to it
+            offset = 0
+        elif not download.target.exists() or download.target.stat().st_size < offset:
+            # The local file is missing data that we recorded as transferred,
+            # so we can't trust it
+            offset = 0
+        identity_recorded = offset > 0
+
+        download.target.parent.mkdir(parents = True, exist_ok = True)
+        with open(download.target, "r+b" if offset else "wb") as file:
+            # Anything after the last checkpoint has not been verified
+            file.truncate(offset)
+            file.seek(offset)
+
+            checkpoint = offset + self._checkpoint_bytes
+            chunks = object_.download(self._chunk_size, progress = self._progress, offset = offset,
+                                      size = identity["size"])
+            for chunk in chunks:
+                file.write(chunk)
+                offset += len(chunk)
+
+                if offset >= checkpoint:
+                    file.flush()
+                    os.fsync(file.fileno())
+                    if not identity_recorded:
+                        self._journal.record_identity(download.key, identity)
+                        identity_recorded = True
+                    self._journal.record_offset(download.key, offset)
+                    checkpoint = offset + self._checkpoint_bytes
+
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _upload(self, upload: Upload):
+        directory = self._device.object_by_path(upload.target)
+        content = upload.source.read_bytes()
+
+        # If we were interrupted after the upload was committed, but before it
+        # was recorded in the journal, the file already exists. Only check this
+        # for a started upload, so an unrelated file isn't mistaken for it.
+        if self._journal.is_started(upload.key):
+            try:
+                existing = directory.children().by_file_name(upload.file_name, unique = False)
+            except ObjectNotFound:
+                pass
+            else:
+                if existing.get_property(definitions.WPD_OBJECT_SIZE) == len(content):
+                    return
+        else:
+            self._journal.record_started(upload.key)
+
+        directory.upload_file(upload.file_name, content, self._chunk_size, progress = self._progress)
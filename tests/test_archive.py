@@ -0,0 +1,60 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from portable_device._api import definitions
+from portable_device.archive import write_archive, _Entry, _unique_name
+
+from fixtures import test_dir
+
+
+class TestArchive:
+    @pytest.fixture
+    def source(self, test_dir):
+        source = test_dir.create_directory("archive")
+        source.upload_file("foo.txt", b"foo")
+        subdir = source.create_directory("bar")
+        subdir.upload_file("baz.txt", b"bazbaz")
+
+        yield source
+
+        source.delete(recursive = True)
+
+    @pytest.mark.device
+    def test_zip(self, source):
+        buffer = io.BytesIO()
+        paths = write_archive(source, buffer, "zip")
+        assert sorted(paths) == ["bar", "bar/baz.txt", "foo.txt"]
+
+        with zipfile.ZipFile(io.BytesIO(buffer.getvalue())) as archive:
+            assert archive.read("foo.txt") == b"foo"
+            assert archive.read("bar/baz.txt") == b"bazbaz"
+
+    @pytest.mark.device
+    def test_tar(self, source):
+        buffer = io.BytesIO()
+        write_archive(source, buffer, "tar.gz")
+
+        with tarfile.open(fileobj = io.BytesIO(buffer.getvalue())) as archive:
+            assert archive.getmember("bar").isdir()
+            assert archive.extractfile("foo.txt").read() == b"foo"
+            assert archive.extractfile("bar/baz.txt").read() == b"bazbaz"
+
+    def test_entry_name(self):
+        assert _Entry.name({definitions.WPD_OBJECT_NAME: "a/b\\c"}) == "a_b_c"
+        assert _Entry.name({definitions.WPD_OBJECT_ORIGINAL_FILE_NAME: "..", definitions.WPD_OBJECT_NAME: "x"}) == "__"
+        assert _Entry.name({definitions.WPD_OBJECT_NAME: "."}) == "_"
+        assert _Entry.name({}) == "_"
+
+    def test_unique_name(self):
+        used = set()
+        assert [_unique_name(name, used) for name in ("a.txt", "a.txt", "b", "a.txt", "b")] == [
+            "a.txt", "a (1).txt", "b", "a (2).txt", "b (1)",
+        ]
+
+    def test_unsupported_format(self):
+        # The format is checked before the source is accessed
+        with pytest.raises(ValueError):
+            write_archive(None, io.BytesIO(), "rar")
@@ -0,0 +1,53 @@
+import pytest
+
+from portable_device.chunk_size import AdaptiveChunkSize, chunk_sizer
+
+
+class TestChunkSize:
+    def test_fixed(self):
+        assert chunk_sizer(None, "device", 100).chunk_size == 100
+        assert chunk_sizer(3, "device", 100).chunk_size == 3
+
+    def test_invalid_bounds(self):
+        with pytest.raises(ValueError):
+            AdaptiveChunkSize(minimum = 10, maximum = 5)
+
+    def test_initial_size_is_clamped(self):
+        policy = AdaptiveChunkSize(minimum = 1000, maximum = 8000)
+        assert chunk_sizer(policy, "device", 100).chunk_size == 1000
+        assert chunk_sizer(policy, "device", 100000).chunk_size == 8000
+
+    def test_grows_while_throughput_improves(self):
+        policy = AdaptiveChunkSize(minimum = 1000, maximum = 64000, window = 1)
+        sizer = chunk_sizer(policy, "device", 1000)
+
+        # Constant latency per chunk, so larger chunks are faster
+        for _ in range(10):
+            sizer.record(sizer.chunk_size, 0.01)
+
+        assert sizer.chunk_size >= 32000
+
+    def test_shrinks_when_throughput_degrades(self):
+        policy = AdaptiveChunkSize(minimum = 1000, maximum = 64000, window = 1)
+        sizer = chunk_sizer(policy, "device", 8000)
+
+        def seconds(chunk_size):
+            # Best throughput at 4000 bytes
+            return chunk_size / (10000 - abs(chunk_size - 4000) / 2)
+
+        for _ in range(20):
+            sizer.record(sizer.chunk_size, seconds(sizer.chunk_size))
+
+        assert 2000 <= sizer.chunk_size <= 8000
+
+    def test_remembers_best_size_per_device(self):
+        policy = AdaptiveChunkSize(minimum = 1000, maximum = 64000, window = 1)
+        sizer = chunk_sizer(policy, "device", 1000)
+        for _ in range(3):
+            sizer.record(sizer.chunk_size, 0.01)
+        sizer.finish()
+
+        assert policy.best_chunk_size("device") == 4000
+        assert policy.best_chunk_size("other") is None
+        assert chunk_sizer(policy, "device", 1000).chunk_size == 4000
+        assert chunk_sizer(policy, "other", 1000).chunk_size == 1000
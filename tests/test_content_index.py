@@ -0,0 +1,62 @@
+import hashlib
+
+from portable_device.content_index import ContentIndex
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class TestContentHasher:
+    def test_incremental(self):
+        hasher = ContentIndex(prefix_size = 4).hasher()
+        for chunk in (b"ab", b"cde", b"f"):
+            hasher.update(chunk)
+
+        assert hasher.size == 6
+        assert hasher.prefix_hash() == sha256(b"abcd")
+        assert hasher.full_hash() == sha256(b"abcdef")
+
+    def test_shorter_than_prefix(self):
+        hasher = ContentIndex(prefix_size = 4).hasher()
+        hasher.update(b"ab")
+
+        assert hasher.prefix_hash() == hasher.full_hash() == sha256(b"ab")
+
+
+class TestContentIndex:
+    def test_lookup(self):
+        index = ContentIndex(prefix_size = 4)
+        index.add(6, sha256(b"abcd"), sha256(b"abcdef"))
+        index.add(6, sha256(b"abcd"), sha256(b"abcdeg"))
+
+        assert len(index) == 2
+        assert index.has_size(6)
+        assert not index.has_size(5)
+        assert index.has_prefix(6, sha256(b"abcd"))
+        assert not index.has_prefix(6, sha256(b"abce"))
+        assert not index.has_prefix(5, sha256(b"abcd"))
+        assert index.has_content(6, sha256(b"abcdeg"))
+        assert not index.has_content(6, sha256(b"abcdeh"))
+
+    def test_add_file(self, tmp_path):
+        (tmp_path / "file").write_bytes(b"abcdef")
+        index = ContentIndex(prefix_size = 4)
+        index.add_file(tmp_path / "file", chunk_size = 3)
+
+        assert list(index) == [(6, sha256(b"abcd"), sha256(b"abcdef"))]
+
+    def test_save_load(self, tmp_path):
+        index = ContentIndex(prefix_size = 4)
+        index.add(6, sha256(b"abcd"), sha256(b"abcdef"))
+        index.add(2, sha256(b"ab"), sha256(b"ab"))
+        index.save(tmp_path / "index")
+
+        loaded = ContentIndex.load(tmp_path / "index")
+        assert loaded.prefix_size == 4
+        assert sorted(loaded) == sorted(index)
+
+    def test_load_missing(self, tmp_path):
+        index = ContentIndex.load(tmp_path / "index", prefix_size = 8)
+        assert len(index) == 0
+        assert index.prefix_size == 8
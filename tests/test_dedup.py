@@ -0,0 +1,104 @@
+import pytest
+
+from portable_device._api import definitions
+from portable_device.content_index import ContentIndex
+from portable_device.dedup import ingest
+
+from fixtures import test_dir
+
+
+class _Object:
+    """Stand-in for an Object, which counts the transferred bytes"""
+
+    def __init__(self, file_name, content):
+        self.object_id = file_name
+        self.content = content
+        self.transferred = 0
+
+    def get_properties(self, keys):
+        return {
+            definitions.WPD_OBJECT_ORIGINAL_FILE_NAME: self.object_id,
+            definitions.WPD_OBJECT_SIZE: len(self.content),
+        }
+
+    def download(self, chunk_size = None, *, progress = None, offset = 0, size = None):
+        for start in range(offset, len(self.content), 16):
+            chunk = self.content[start:start + 16]
+            self.transferred += len(chunk)
+            yield chunk
+
+
+class TestIngest:
+    @pytest.fixture
+    def index(self):
+        index = ContentIndex(prefix_size = 16)
+        hasher = index.hasher()
+        hasher.update(b"A" * 100)
+        index.add_hasher(hasher)
+        return index
+
+    def test_same_prefix(self, index, tmp_path):
+        known = _Object("known", b"A" * 100)
+        different = _Object("different", b"A" * 50 + b"B" * 50)
+
+        known_result, different_result = ingest([known, different], tmp_path, index)
+        # Only recognized by the full hash
+        assert known_result.duplicate
+        assert not different_result.duplicate
+        assert different_result.path.read_bytes() == different.content
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["different"]
+
+    def test_trust_prefix(self, index, tmp_path):
+        known = _Object("known", b"A" * 100)
+        different = _Object("different", b"A" * 50 + b"B" * 50)
+        new = _Object("new", b"C" * 100)
+
+        results = ingest([known, different, new], tmp_path, index, trust_prefix = True)
+        assert [result.duplicate for result in results] == [True, True, False]
+        # Only the prefix is transferred for the duplicates, and not again for
+        # the new object
+        assert known.transferred == different.transferred == 16
+        assert new.transferred == 100
+        assert results[2].path.read_bytes() == new.content
+
+    def test_small_object(self, index, tmp_path):
+        hasher = index.hasher()
+        hasher.update(b"S" * 10)
+        index.add_hasher(hasher)
+
+        # Not larger than the prefix, so the prefix is all of the content
+        known = _Object("known", b"S" * 10)
+        new = _Object("new", b"T" * 10)
+
+        known_result, new_result = ingest([known, new], tmp_path / "library", index)
+        assert known_result.duplicate
+        assert new_result.path.read_bytes() == new.content
+        assert known.transferred == new.transferred == 10
+
+    @pytest.fixture
+    def source(self, test_dir):
+        source = test_dir.create_directory("ingest")
+        source.upload_file("a.bin", b"a" * 100)
+        source.upload_file("b.bin", b"b" * 100)
+        source.upload_file("c.bin", b"a" * 100)
+        source.upload_file("d.bin", b"d" * 50)
+
+        yield source
+
+        source.delete(recursive = True)
+
+    @pytest.mark.device
+    def test_ingest(self, source, tmp_path):
+        (tmp_path / "known.bin").write_bytes(b"b" * 100)
+        index = ContentIndex(prefix_size = 16)
+        index.add_file(tmp_path / "known.bin")
+
+        results = ingest(source.children(), tmp_path / "library", index)
+        downloaded = {result.file_name for result in results if not result.duplicate}
+        assert downloaded in ({"a.bin", "d.bin"}, {"c.bin", "d.bin"})
+        assert sorted(path.name for path in (tmp_path / "library").iterdir()) == sorted(downloaded)
+        assert len(index) == 3
+
+        # Everything is known now
+        results = ingest(source.children(), tmp_path / "library", index)
+        assert all(result.duplicate for result in results)
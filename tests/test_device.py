@@ -1,9 +1,10 @@
 from itertools import islice
+import weakref
 
 import pytest
 
-from portable_device import Device, Object
-from portable_device.exceptions import DeviceNotFound, AmbiguousDevice
+from portable_device import Device, Object, PersistentIdIndex
+from portable_device.exceptions import DeviceNotFound, AmbiguousDevice, ObjectNotFound
 
 from fixtures import device
 
@@ -14,6 +15,23 @@ class TestDevice:
         device = Device("foobar")
         assert device.device_id == "foobar"
 
+    def test_not_kept_alive(self):
+        device = Device("foobar", api_device = object())
+        assert device._device is not None
+        assert device.device_object.device is device
+
+        reference = weakref.ref(device)
+        del device
+        assert reference() is None
+
+    def test_release(self):
+        api_device = object()
+        device = Device("foobar", api_device = api_device)
+        assert device._device is api_device
+
+        device.release()
+        assert "_device" not in vars(device)
+
     # Creation #################################################################
 
     def test_all(self):
@@ -143,3 +161,32 @@ class TestDevice:
             # Limit to 10 objects, walking the whole tree might take a long time
             for depth, object_ in islice(device.walk(), 0, 10):
                 assert isinstance(object_, Object)
+
+    # Persistent unique IDs ####################################################
+
+    @pytest.mark.device
+    def test_object_by_persistent_id(self, device):
+        with device:
+            root_object = device.root_objects()[0]
+            persistent_id = root_object.persistent_unique_id()
+
+            other = device.object_by_persistent_id(persistent_id)
+            assert other.object_id == root_object.object_id
+            assert device.persistent_id_index.is_verified(persistent_id)
+
+    @pytest.mark.device
+    def test_object_by_persistent_id_not_found(self, device):
+        with device:
+            with pytest.raises(ObjectNotFound):
+                device.object_by_persistent_id("mutakirorikatum")
+
+    @pytest.mark.device
+    def test_object_by_persistent_id_outdated_index(self, device):
+        with device:
+            root_object = device.root_objects()[0]
+            persistent_id = root_object.persistent_unique_id()
+
+            device.persistent_id_index = PersistentIdIndex()
+            device.persistent_id_index.add(persistent_id, "outdated", verified = False)
+
+            assert device.object_by_persistent_id(persistent_id).object_id == root_object.object_id
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from portable_device import DevicePool
+
+from fixtures import device
+
+
+class TestDevicePool:
+    def test_empty(self):
+        assert DevicePool([]).run(lambda device: None) == {}
+
+    def test_results_and_errors(self):
+        def function(device):
+            if device.device_id == "bad":
+                raise ValueError(device.device_id)
+            return device.device_id.upper()
+
+        results = DevicePool(["foo", "bad", "bar"]).run(function, open = False)
+        assert list(results) == ["foo", "bad", "bar"]
+
+        assert results["foo"].ok
+        assert results["foo"].get() == "FOO"
+        assert results["bar"].result == "BAR"
+
+        assert not results["bad"].ok
+        assert isinstance(results["bad"].error, ValueError)
+        with pytest.raises(ValueError):
+            results["bad"].get()
+
+    def test_worker_threads(self):
+        threads = {}
+
+        def function(device):
+            threads[device.device_id] = threading.current_thread()
+            # Keep the worker busy so that every device gets its own
+            time.sleep(0.1)
+
+        DevicePool(["foo", "bar"]).run(function, open = False)
+        assert threads["foo"] is not threads["bar"]
+        assert threading.current_thread() not in threads.values()
+
+    def test_max_workers(self):
+        lock = threading.Lock()
+        running = 0
+        max_running = 0
+
+        def function(device):
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+
+        DevicePool([str(i) for i in range(6)], max_workers = 2).run(function, open = False)
+        assert max_running <= 2
+
+    @pytest.mark.device
+    def test_run(self, device):
+        results = DevicePool([device]).run(lambda d: len(d.root_objects()))
+        assert results[device.device_id].get() > 0
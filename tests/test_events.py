@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from portable_device import Device
+from portable_device.events import EventKind, DeviceEvent, LocalEventSource, EventSubscription
+
+from fixtures import test_dir
+
+
+class TestEvents:
+    def test_iterate(self):
+        source = LocalEventSource()
+        subscription = Device("foobar").subscribe(source = source)
+
+        source.emit(DeviceEvent(EventKind.OBJECT_ADDED, object_id = "o1"))
+        source.emit(DeviceEvent(EventKind.OBJECT_REMOVED, object_id = "o2"))
+        subscription.close()
+
+        assert [(e.kind, e.object_id) for e in subscription] == [
+            (EventKind.OBJECT_ADDED, "o1"),
+            (EventKind.OBJECT_REMOVED, "o2"),
+        ]
+
+    def test_get(self):
+        source = LocalEventSource()
+        with EventSubscription(source) as subscription:
+            assert subscription.get(timeout = 0) is None
+
+            source.emit(DeviceEvent(EventKind.DEVICE_REMOVED))
+            assert subscription.get(timeout = 1).kind == EventKind.DEVICE_REMOVED
+
+        assert subscription.get() is None
+
+    def test_callback(self):
+        source = LocalEventSource()
+        events = []
+        received = threading.Event()
+
+        def callback(event):
+            events.append((event, threading.current_thread()))
+            received.set()
+
+        with EventSubscription(source, callback) as subscription:
+            source.emit(DeviceEvent(EventKind.OBJECT_UPDATED, object_id = "o1"))
+            assert received.wait(timeout = 1)
+
+            with pytest.raises(RuntimeError):
+                iter(subscription)
+
+        assert events[0][0].object_id == "o1"
+        assert events[0][1] is not threading.current_thread()
+
+    def test_callback_error(self):
+        source = LocalEventSource()
+        events = []
+
+        def callback(event):
+            if event.object_id == "o1":
+                raise ValueError("callback failed")
+            events.append(event)
+
+        subscription = EventSubscription(source, callback)
+        source.emit(DeviceEvent(EventKind.OBJECT_ADDED, object_id = "o1"))
+        source.emit(DeviceEvent(EventKind.OBJECT_ADDED, object_id = "o2"))
+
+        with pytest.raises(ValueError, match = "callback failed"):
+            subscription.close()
+
+        # The events after the failing one are still delivered
+        assert [event.object_id for event in events] == ["o2"]
+
+    def test_callback_error_in_failing_block(self):
+        source = LocalEventSource()
+        received = threading.Event()
+
+        def callback(event):
+            received.set()
+            raise ValueError("callback failed")
+
+        with pytest.raises(KeyError) as error:
+            with EventSubscription(source, callback):
+                source.emit(DeviceEvent(EventKind.OBJECT_ADDED))
+                assert received.wait(timeout = 1)
+                raise KeyError("body failed")
+
+        assert isinstance(error.value.__context__, ValueError)
+
+    def test_failing_source_starts_no_thread(self):
+        class FailingSource(LocalEventSource):
+            def start(self, deliver):
+                raise RuntimeError("advise failed")
+
+        threads = threading.active_count()
+        with pytest.raises(RuntimeError, match = "advise failed"):
+            EventSubscription(FailingSource(), lambda event: None)
+        assert threading.active_count() == threads
+
+    def test_closed_source_does_not_deliver(self):
+        source = LocalEventSource()
+        subscription = EventSubscription(source)
+        subscription.close()
+
+        source.emit(DeviceEvent(EventKind.OBJECT_ADDED))
+        assert list(subscription) == []
+
+    @pytest.mark.device
+    def test_object_added(self, test_dir):
+        with test_dir.device.subscribe() as subscription:
+            directory = test_dir.create_directory("events")
+
+            while event := subscription.get(timeout = 10):
+                if event.kind == EventKind.OBJECT_ADDED and event.object_id == directory.object_id:
+                    break
+            else:
+                pytest.fail("No event for the created directory")
+
+        directory.delete(False)
@@ -0,0 +1,43 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+src = Path(__file__).resolve().parent.parent / "src"
+
+
+def imported_modules(code: str) -> set[str]:
+    """Runs `code` in a fresh interpreter and returns the modules it imported"""
+    result = subprocess.run([sys.executable, "-c", f"{code}\nimport sys\nprint(*sys.modules)"],
+                            env = {**os.environ, "PYTHONPATH": str(src)},
+                            capture_output = True, text = True, check = True)
+    return set(result.stdout.split())
+
+
+class TestImport:
+    def test_import_is_lazy(self):
+        modules = imported_modules("import portable_device")
+        assert "comtypes" not in modules
+        assert "portable_device_api" not in modules
+        assert "portable_device.device" not in modules
+
+    def test_exceptions_are_lightweight(self):
+        modules = imported_modules("from portable_device.exceptions import DeviceNotFound")
+        assert "comtypes" not in modules
+        assert "portable_device_api" not in modules
+
+    def test_unknown_attribute(self):
+        modules = imported_modules(
+            "import portable_device\n"
+            "try:\n"
+            "    portable_device.foobar\n"
+            "except AttributeError:\n"
+            "    pass\n"
+            "else:\n"
+            "    raise AssertionError\n")
+        assert "comtypes" not in modules
+
+    def test_dir(self):
+        import portable_device
+        assert "Device" in dir(portable_device)
+        assert "Object" in portable_device.__all__
@@ -4,7 +4,7 @@ import re
 from portable_device_api import errors, definitions
 import pytest
 
-from portable_device import Object
+from portable_device import Object, AdaptiveChunkSize
 
 from fixtures import test_dir, device
 
@@ -57,6 +57,21 @@ class TestObject:
         assert properties[definitions.WPD_OBJECT_CONTENT_TYPE] == definitions.WPD_CONTENT_TYPE_FOLDER
         # TODO also test the content type of a file
 
+    @pytest.mark.device
+    def test_get_properties_missing(self, device):
+        with device:
+            # The device object doesn't have an original file name
+            device_object = device.device_object
+            properties = device_object.get_properties([definitions.WPD_OBJECT_ORIGINAL_FILE_NAME,
+                                                       definitions.WPD_OBJECT_PARENT_ID])
+
+            assert definitions.WPD_OBJECT_ORIGINAL_FILE_NAME not in properties
+            assert properties.missing == (definitions.WPD_OBJECT_ORIGINAL_FILE_NAME, )
+            assert list(properties) == [definitions.WPD_OBJECT_PARENT_ID]
+
+            assert device_object.file_name() is None
+            assert device_object.get_property(definitions.WPD_OBJECT_ORIGINAL_FILE_NAME, "") == ""
+
     def test_object_name(self, test_dir: Object):
         assert re.fullmatch(r'\d\d\d\d-\d\d-\d\d_\d\d-\d\d-\d\d', test_dir.object_name())
 
@@ -71,6 +86,31 @@ class TestObject:
         assert attributes[definitions.WPD_PROPERTY_ATTRIBUTE_CAN_READ] is True
         assert attributes[definitions.WPD_PROPERTY_ATTRIBUTE_CAN_WRITE] is False
 
+    # Resources ################################################################
+
+    @pytest.mark.device
+    def test_supported_resources(self, test_dir):
+        file = test_dir.upload_file("resources.txt", b"foobar")
+        assert definitions.WPD_RESOURCE_DEFAULT in file.supported_resources()
+        assert file.supports_resource(definitions.WPD_RESOURCE_DEFAULT)
+        file.delete(False)
+
+    @pytest.mark.device
+    def test_read_resource(self, test_dir):
+        content = b"foobar"
+        file = test_dir.upload_file("resources.txt", content)
+        assert file.read_resource(definitions.WPD_RESOURCE_DEFAULT) == content
+        assert file.download_all(resource = definitions.WPD_RESOURCE_DEFAULT) == content
+        file.delete(False)
+
+    @pytest.mark.device
+    def test_thumbnail_missing(self, test_dir):
+        # A text file has no thumbnail
+        file = test_dir.upload_file("resources.txt", b"foobar")
+        if not file.supports_resource(definitions.WPD_RESOURCE_THUMBNAIL):
+            assert file.thumbnail() is None
+        file.delete(False)
+
     # Object access ############################################################
 
     @pytest.mark.device
@@ -130,6 +170,35 @@ class TestObject:
         assert delete_result == errors.ERROR_FILE_NOT_FOUND or delete_result == errors.E_MTP_INVALID_OBJECT_HANDLE
         assert file_name not in test_dir.children().object_names()
 
+    @pytest.mark.device
+    def test_download_adaptive(self, test_dir):
+        content = bytes(range(256)) * 1024
+        policy = AdaptiveChunkSize(minimum = 1024, maximum = 64 * 1024, window = 1)
+
+        file = test_dir.upload_file("adaptive.bin", content, chunk_size = policy)
+        assert file.download_all(chunk_size = policy) == content
+        assert policy.best_chunk_size(test_dir.device.device_id) is not None
+
+        assert file.delete(False) == 0
+
+    @pytest.mark.device
+    def test_progress(self, test_dir):
+        content = b"foobarx"
+        upload_reports = []
+        download_reports = []
+
+        file = test_dir.upload_file("progress.txt", content, progress = upload_reports.append)
+        assert upload_reports[-1].finished
+        assert upload_reports[-1].object_id == file.object_id
+        assert upload_reports[-1].bytes_done == len(content)
+
+        assert file.download_all(chunk_size = 3, progress = download_reports.append) == content
+        assert download_reports[-1].finished
+        assert download_reports[-1].bytes_done == len(content)
+        assert download_reports[-1].total_bytes == len(content)
+
+        assert file.delete(False) == 0
+
     # TODO test_delete
 
     @pytest.mark.device
@@ -171,6 +240,67 @@ class TestObject:
 
     # TODO test_move_directory
 
+    @pytest.mark.device
+    def test_copy_file(self, test_dir):
+        content = bytes(range(256)) * 64
+
+        source = test_dir.create_directory("source")
+        target = test_dir.create_directory("target")
+        file = source.upload_file("file", content)
+
+        copy = file.copy_into(target, chunk_size = 1000)
+        assert copy.object_id != file.object_id
+        assert target.children().by_file_name("file").object_id == copy.object_id
+        assert copy.download_all() == content
+        assert file.download_all() == content
+
+        source.delete(recursive = True)
+        target.delete(recursive = True)
+
+    @pytest.mark.device
+    def test_copy_directory(self, test_dir):
+        source = test_dir.create_directory("source")
+        source.upload_file("foo", b"foo")
+        source.create_directory("bar").upload_file("baz", b"baz")
+
+        # Copy into the source itself: the copy must not be copied again
+        copy = source.copy_into(source)
+        assert sorted(source.children().object_orignal_file_names()) == ["bar", "foo", "source"]
+        assert copy.children().by_file_name("foo").download_all() == b"foo"
+        assert copy.child_by_path(["bar", "baz"]).download_all() == b"baz"
+        assert len(copy.child_by_path(["bar"]).children()) == 1
+
+        source.delete(recursive = True)
+
+    @pytest.mark.device
+    def test_copy_directory_into_descendant(self, test_dir):
+        source = test_dir.create_directory("source")
+        subdirectory = source.create_directory("bar").create_directory("baz")
+
+        with pytest.raises(ValueError):
+            source.copy_into(subdirectory)
+        assert len(subdirectory.children()) == 0
+
+        source.delete(recursive = True)
+
+    @pytest.mark.device
+    def test_copy_files(self, test_dir):
+        source = test_dir.create_directory("source")
+        target = test_dir.create_directory("target")
+        source.upload_file("foo", b"foo")
+        source.upload_file("bar", b"bar" * 1000)
+        source.create_directory("baz").upload_file("qux", b"")
+
+        # All files are downloaded through the same connection
+        copies = source.children().copy_into(target, chunk_size = 100)
+        assert len(copies) == 3
+        assert target.children().by_file_name("foo").download_all() == b"foo"
+        assert target.children().by_file_name("bar").download_all() == b"bar" * 1000
+        assert target.child_by_path(["baz", "qux"]).download_all() == b""
+
+        source.delete(recursive = True)
+        target.delete(recursive = True)
+
     # Parent ###################################################################
 
     def test_parent(self, test_dir):
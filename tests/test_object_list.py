@@ -3,11 +3,78 @@ import re
 from portable_device_api import errors
 import pytest
 
-from portable_device import Object
+from portable_device import Object, ObjectList, LazyObjectList
+from portable_device.exceptions import ObjectNotFound, AmbiguousObject
 
 from fixtures import test_dir
 
 
+class _Named:
+    """Stand-in for an Object with a file name"""
+    def __init__(self, name: str):
+        self.name = name
+
+    def file_name(self) -> str:
+        return self.name
+
+
+class TestLazyObjectList:
+    def lazy_object_list(self, names: list[str]):
+        enumerated = []
+
+        def objects():
+            for name in names:
+                enumerated.append(name)
+                yield _Named(name)
+
+        return LazyObjectList(objects()), enumerated
+
+    def test_index(self):
+        objects, enumerated = self.lazy_object_list(["a", "b", "c", "d"])
+        assert objects[1].name == "b"
+        assert enumerated == ["a", "b"]
+        assert objects[-1].name == "d"
+        assert enumerated == ["a", "b", "c", "d"]
+
+        with pytest.raises(IndexError):
+            objects[4]
+
+    def test_slice(self):
+        objects, enumerated = self.lazy_object_list(["a", "b", "c", "d"])
+        assert [o.name for o in objects[:2]] == ["a", "b"]
+        assert isinstance(objects[:2], ObjectList)
+        assert enumerated == ["a", "b"]
+
+    def test_bool(self):
+        objects, enumerated = self.lazy_object_list(["a", "b"])
+        assert objects
+        assert enumerated == ["a"]
+
+        objects, enumerated = self.lazy_object_list([])
+        assert not objects
+
+    def test_iteration_is_cached(self):
+        objects, enumerated = self.lazy_object_list(["a", "b", "c"])
+        assert [o.name for o in objects] == ["a", "b", "c"]
+        assert [o.name for o in objects] == ["a", "b", "c"]
+        assert enumerated == ["a", "b", "c"]
+        assert len(objects) == 3
+        assert objects.is_complete
+
+    def test_by_file_name_first(self):
+        objects, enumerated = self.lazy_object_list(["a", "b", "c", "d"])
+        assert objects.by_file_name("b", unique = False).name == "b"
+        assert enumerated == ["a", "b"]
+
+    def test_by_file_name_unique(self):
+        objects, enumerated = self.lazy_object_list(["a", "b", "c", "b"])
+        with pytest.raises(AmbiguousObject):
+            objects.by_file_name("b")
+        with pytest.raises(ObjectNotFound):
+            objects.by_file_name("x")
+        assert objects.by_file_name("c").name == "c"
+
+
 class TestObjectList:
     @pytest.mark.device
     def test_delete(self, test_dir):
@@ -33,3 +100,16 @@ class TestObjectList:
         assert delete_result == [errors.ERROR_FILE_NOT_FOUND] * len(dir_names) or delete_result == [errors.E_MTP_INVALID_OBJECT_HANDLE] * len(dir_names)
         for dir_name in dir_names:
             assert dir_name not in test_dir.children().object_names()
+
+    @pytest.mark.device
+    def test_thumbnails(self, test_dir):
+        test_dir.upload_file("foo.txt", b"foo")
+        test_dir.upload_file("bar.txt", b"bar")
+
+        children = test_dir.children()
+        thumbnails = list(children.thumbnails())
+        assert [o.object_id for o, _ in thumbnails] == [o.object_id for o in children]
+        for object_, thumbnail in thumbnails:
+            assert thumbnail is None or isinstance(thumbnail, (bytes, bytearray))
+
+        assert children.delete(False) == [0] * len(children)
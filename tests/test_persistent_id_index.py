@@ -0,0 +1,41 @@
+from portable_device.persistent_id_index import PersistentIdIndex
+
+
+class TestPersistentIdIndex:
+    def test_add(self):
+        index = PersistentIdIndex()
+        index.add("p1", "o1")
+        index.add("p2", "o2", verified = False)
+
+        assert len(index) == 2
+        assert "p1" in index
+        assert index.get("p1") == "o1"
+        assert index.get("p3") is None
+        assert index.is_verified("p1")
+        assert not index.is_verified("p2")
+
+        index.verify("p2")
+        assert index.is_verified("p2")
+
+    def test_discard(self):
+        index = PersistentIdIndex()
+        index.add("p1", "o1")
+        index.discard("p1")
+        index.discard("p2")
+
+        assert "p1" not in index
+        assert not index.is_verified("p1")
+
+    def test_save_load(self, tmp_path):
+        index = PersistentIdIndex()
+        index.update([("p1", "o1"), ("p2", "o2")])
+        index.save(tmp_path / "index.json")
+
+        loaded = PersistentIdIndex.load(tmp_path / "index.json")
+        assert loaded.get("p1") == "o1"
+        assert loaded.get("p2") == "o2"
+        # Object IDs from an earlier session may be outdated
+        assert not loaded.is_verified("p1")
+
+    def test_load_missing(self, tmp_path):
+        assert len(PersistentIdIndex.load(tmp_path / "missing.json")) == 0
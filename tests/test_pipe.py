@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from portable_device.pipe import pipe
+
+
+class TestPipe:
+    def test_chunks(self):
+        assert list(pipe(iter([b"foo", b"bar", b"x"]))) == [b"foo", b"bar", b"x"]
+
+    def test_empty(self):
+        assert list(pipe(iter([]))) == []
+
+    def test_background_thread(self):
+        threads = []
+
+        def chunks():
+            threads.append(threading.current_thread())
+            yield b"foo"
+
+        assert list(pipe(chunks())) == [b"foo"]
+        assert threads[0] is not threading.current_thread()
+
+    def test_bounded(self):
+        produced = 0
+        may_continue = threading.Event()
+
+        def chunks():
+            nonlocal produced
+            for _ in range(100):
+                produced += 1
+                yield b"x"
+
+        piped = pipe(chunks(), buffers = 2)
+        assert next(piped) == b"x"
+        # Give the producer time to fill the buffer
+        may_continue.wait(0.3)
+        # One consumed, two buffered, one waiting to be buffered
+        assert produced <= 4
+        piped.close()
+
+    def test_exception(self):
+        def chunks():
+            yield b"foo"
+            raise ValueError("broken")
+
+        piped = pipe(chunks())
+        assert next(piped) == b"foo"
+        with pytest.raises(ValueError, match = "broken"):
+            next(piped)
+
+    def test_close_stops_producer(self):
+        closed = threading.Event()
+
+        def chunks():
+            try:
+                while True:
+                    yield b"x"
+            finally:
+                closed.set()
+
+        piped = pipe(chunks())
+        assert next(piped) == b"x"
+        piped.close()
+        assert closed.is_set()
@@ -0,0 +1,66 @@
+from portable_device.progress import TransferProgress, ProgressReporter, progress_reporter
+
+
+class TestProgress:
+    def test_no_callback(self):
+        reporter = progress_reporter(None)
+        assert type(reporter) is ProgressReporter
+        reporter.update(10, 0.0)
+        reporter.finish()
+
+    def test_rate_limited(self):
+        reports: list[TransferProgress] = []
+        reporter = progress_reporter(reports.append, object_id = "o1", total_bytes = 100, interval = 3600)
+
+        for _ in range(10):
+            reporter.update(10, 0.0)
+        assert reports == []
+
+        reporter.finish()
+        assert len(reports) == 1
+        assert reports[0].finished
+        assert reports[0].object_id == "o1"
+        assert reports[0].bytes_done == 100
+        assert reports[0].total_bytes == 100
+        assert reports[0].fraction == 1
+
+    def test_reports_after_interval(self):
+        reports: list[TransferProgress] = []
+        reporter = progress_reporter(reports.append, file_name = "file", interval = 0)
+
+        reporter.update(10, float("inf"))
+        assert len(reports) == 1
+        assert not reports[0].finished
+        assert reports[0].bytes_done == 10
+        assert reports[0].total_bytes is None
+        assert reports[0].fraction is None
+
+    def test_object_id_on_finish(self):
+        reports: list[TransferProgress] = []
+        reporter = progress_reporter(reports.append, file_name = "file", total_bytes = 5)
+        reporter.update(5, 0.0)
+        reporter.finish("o2")
+
+        assert reports[-1].object_id == "o2"
+        assert reports[-1].file_name == "file"
+        assert reports[-1].average_rate >= 0
+
+    def test_cancel(self):
+        reports: list[TransferProgress] = []
+        reporter = progress_reporter(reports.append, total_bytes = 100, interval = 3600)
+        reporter.update(10, 0.0)
+        reporter.cancel()
+
+        assert len(reports) == 1
+        assert reports[0].cancelled
+        assert not reports[0].finished
+        assert reports[0].bytes_done == 10
+
+    def test_initial_bytes(self):
+        reports: list[TransferProgress] = []
+        reporter = progress_reporter(reports.append, total_bytes = 100, initial_bytes = 60, interval = 3600)
+        reporter.update(40, 0.0)
+        reporter.finish()
+
+        assert reports[0].bytes_done == 100
+        assert reports[0].fraction == 1
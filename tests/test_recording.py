@@ -0,0 +1,144 @@
+from datetime import datetime
+
+import pytest
+
+from portable_device._api import definitions
+from portable_device.recording import Recorder, encode
+from portable_device.replay import ReplaySession, ReplayMismatch, ReplayedError
+
+
+class _Values:
+    """Stand-in for PortableDeviceValues"""
+    def __init__(self, items):
+        self._items = items
+
+    def get_count(self):
+        return len(self._items)
+
+    def get_at(self, index):
+        return self._items[index]
+
+
+class _Variant:
+    def __init__(self, vt, value):
+        self.vt = vt
+        self.value = value
+
+
+class _Stream:
+    def __init__(self, data):
+        self._data = data
+
+    def remote_read(self, size):
+        chunk, self._data = self._data[:size], self._data[size:]
+        return chunk
+
+    def seek(self, offset):
+        error = RuntimeError("not implemented")
+        error.hresult = -2147467263
+        raise error
+
+
+class _Api:
+    """Stand-in for the PortableDevice interface tree"""
+    def open(self, device_id):
+        pass
+
+    def enum_objects(self, object_id):
+        return ["o1", "o2"]
+
+    def get_values(self, object_id, keys):
+        return _Values([("name", _Variant(31, f"{object_id}.txt")), ("date", _Variant(7, datetime(2020, 1, 2)))])
+
+    def get_stream(self, object_id):
+        return _Stream(b"foobarx"), 3
+
+
+def record_session(path):
+    recorder = Recorder()
+    api = recorder.proxy(_Api())
+
+    api.open("device")
+    assert api.enum_objects("root") == ["o1", "o2"]
+    assert api.get_values("o1", _Values(["name", "date"])).get_at(0)[1].value == "o1.txt"
+
+    stream, size = api.get_stream("o1")
+    assert stream.remote_read(size) == b"foo"
+    with pytest.raises(RuntimeError):
+        stream.seek(3)
+
+    recorder.save(path)
+    return recorder.call_count
+
+
+class TestRecording:
+    def test_replay(self, tmp_path):
+        call_count = record_session(tmp_path / "session.gz")
+
+        session = ReplaySession.load(tmp_path / "session.gz", latency_scale = 0)
+        assert session.call_count == call_count
+        api = session.root()
+
+        api.open("device")
+        assert api.enum_objects("root") == ["o1", "o2"]
+
+        values = api.get_values("o1", _Values(["name", "date"]))
+        assert values.get_count() == 2
+        key, value = values.get_at(1)
+        assert value.value == datetime(2020, 1, 2)
+
+        stream, size = api.get_stream("o1")
+        assert size == 3
+        # Only the size of the data is recorded
+        assert stream.remote_read(size) == bytes(3)
+        # A COMError if comtypes is available
+        with pytest.raises(ReplayedError) as error:
+            stream.seek(3)
+        assert error.value.hresult == -2147467263
+
+        assert session.remaining_calls == 0
+
+    def test_mismatch(self, tmp_path):
+        record_session(tmp_path / "session.gz")
+        api = ReplaySession.load(tmp_path / "session.gz", latency_scale = 0).root()
+
+        # Not recorded
+        with pytest.raises(ReplayMismatch):
+            api.close()
+
+        # Different arguments
+        with pytest.raises(ReplayMismatch):
+            api.enum_objects("other")
+
+    def test_replay_device(self):
+        # A session as recorded from a walk of a device with one object, which
+        # is replayed through a Device (without portable_device_api, unless
+        # it is available)
+        name_key = encode(definitions.WPD_OBJECT_NAME)
+        names = {"DEVICE": "Device", "o1": "Storage"}
+        calls = [
+            {"h": 0, "m": "open", "a": ["device"], "r": None},
+            {"h": 0, "m": "content", "a": [], "r": {"handle": 1}},
+            {"h": 1, "m": "properties", "a": [], "r": {"handle": 2}},
+            *({"h": 2, "m": "get_values", "a": [object_id, {"collection": [name_key]}],
+               "r": {"collection": [{"tuple": [name_key, {"variant": [31, name]}]}]}}
+              for object_id, name in names.items()),
+            {"h": 1, "m": "enum_objects", "a": ["DEVICE"], "r": {"handle": 3}},
+            {"h": 3, "m": "next", "a": [1], "r": ["o1"]},
+            {"h": 3, "m": "next", "a": [1], "r": []},
+            {"h": 1, "m": "enum_objects", "a": ["o1"], "r": {"handle": 4}},
+            {"h": 4, "m": "next", "a": [1], "r": []},
+            {"h": 0, "m": "close", "a": [], "r": None},
+        ]
+        header = {"device_id": "device", "description": "Phone", "friendly_name": "Phone", "manufacturer": "Acme"}
+        session = ReplaySession(header, [{**call, "t": 0} for call in calls], latency_scale = 0)
+
+        device = session.device()
+        assert device.description == "Phone"
+        with device:
+            assert [(depth, object_.object_name()) for depth, object_ in device.walk()] == [
+                (0, "Device"),
+                (1, "Storage"),
+            ]
+
+        assert session.remaining_calls == 0
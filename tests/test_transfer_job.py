@@ -0,0 +1,139 @@
+import pytest
+
+from portable_device.transfer_job import TransferJournal, TransferJob
+
+from fixtures import test_dir
+
+
+class TestTransferJournal:
+    def test_empty(self, tmp_path):
+        journal = TransferJournal(tmp_path / "journal")
+        assert not journal.is_done("a")
+        assert journal.offset("a") == 0
+
+    def test_persistence(self, tmp_path):
+        journal = TransferJournal(tmp_path / "journal")
+        journal.record_offset("a", 10)
+        journal.record_offset("a", 20)
+        journal.record_offset("b", 5)
+        journal.record_done("b")
+
+        journal = TransferJournal(tmp_path / "journal")
+        assert journal.offset("a") == 20
+        assert not journal.is_done("a")
+        assert journal.is_done("b")
+        assert journal.offset("b") == 0
+
+    def test_identity(self, tmp_path):
+        journal = TransferJournal(tmp_path / "journal")
+        assert journal.identity("a") is None
+        journal.record_identity("a", {"size": 10, "modified": None})
+        journal.record_offset("a", 5)
+
+        journal = TransferJournal(tmp_path / "journal")
+        assert journal.identity("a") == {"size": 10, "modified": None}
+
+        journal.record_done("a")
+        assert journal.identity("a") is None
+
+    def test_started(self, tmp_path):
+        journal = TransferJournal(tmp_path / "journal")
+        journal.record_started("a")
+
+        journal = TransferJournal(tmp_path / "journal")
+        assert journal.is_started("a")
+
+        journal.record_done("a")
+        assert not journal.is_started("a")
+
+    def test_partial_record(self, tmp_path):
+        journal = TransferJournal(tmp_path / "journal")
+        journal.record_done("a")
+        with open(tmp_path / "journal", "a") as file:
+            file.write('{"op": "done", "ke')
+
+        journal = TransferJournal(tmp_path / "journal")
+        assert journal.is_done("a")
+
+
+class TestTransferJob:
+    @pytest.mark.device
+    def test_download_and_upload(self, test_dir, tmp_path):
+        content = bytes(range(256)) * 64
+        source = tmp_path / "source.bin"
+        source.write_bytes(content)
+
+        directory = test_dir.create_directory("job")
+        directory_path = [*self.path_of(directory)]
+
+        job = TransferJob(test_dir.device, tmp_path / "journal", checkpoint_bytes = 1024)
+        job.add_upload(source, directory_path)
+        assert job.run() == job.transfers
+        assert job.pending() == []
+
+        job = TransferJob(test_dir.device, tmp_path / "journal", checkpoint_bytes = 1024)
+        job.add_upload(source, directory_path)
+        download = job.add_download([*directory_path, "source.bin"], tmp_path / "target.bin")
+        assert job.run() == [download]
+        assert (tmp_path / "target.bin").read_bytes() == content
+
+        directory.delete(recursive = True)
+
+    @pytest.mark.parametrize("replaced", [False, True])
+    @pytest.mark.device
+    def test_resume_download(self, test_dir, tmp_path, replaced):
+        content = bytes(range(256)) * 64
+        directory = test_dir.create_directory("resume")
+        file = directory.upload_file("file.bin", content)
+        directory_path = [*self.path_of(directory)]
+
+        # Simulate an interrupted download: the first 1000 bytes are verified,
+        # some garbage after that is not. The verified bytes differ from the
+        # object's, so we can tell whether they were kept.
+        target = tmp_path / "target.bin"
+        target.write_bytes(b"x" * 1000 + b"garbage")
+
+        job = TransferJob(test_dir.device, tmp_path / "journal")
+        download = job.add_download([*directory_path, "file.bin"], target)
+        identity = TransferJob._identity(file)
+        if replaced:
+            identity = {**identity, "size": identity["size"] + 1}
+        job.journal.record_identity(download.key, identity)
+        job.journal.record_offset(download.key, 1000)
+
+        job.run()
+        if replaced:
+            # Downloaded again from the start
+            assert target.read_bytes() == content
+        else:
+            assert target.read_bytes() == b"x" * 1000 + content[1000:]
+
+        directory.delete(recursive = True)
+
+    @pytest.mark.device
+    def test_upload_existing_file(self, test_dir, tmp_path):
+        # An unrelated file with the same name and size is not mistaken for a
+        # completed upload
+        directory = test_dir.create_directory("existing")
+        directory.upload_file("source.bin", b"old")
+        source = tmp_path / "source.bin"
+        source.write_bytes(b"new")
+
+        job = TransferJob(test_dir.device, tmp_path / "journal")
+        job.add_upload(source, [*self.path_of(directory)])
+        job.run()
+        assert sorted(o.download_all() for o in directory.children()) == [b"new", b"old"]
+
+        directory.delete(recursive = True)
+
+    @staticmethod
+    def path_of(object_):
+        """The device path of an object (root object name, then file names)"""
+        names = []
+        while (parent := object_.parent()) is not None:
+            if parent.parent() is None:
+                names.append(object_.object_name())
+            else:
+                names.append(object_.file_name())
+            object_ = parent
+        return reversed(names)